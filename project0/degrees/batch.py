@@ -0,0 +1,114 @@
+import argparse
+import functools
+import json
+import multiprocessing
+import os
+import sys
+
+import degrees
+from stats import SearchStats
+
+
+def parse_pair(line):
+    """
+    Returns the (source, target) names or ids on one input line.
+    Lines are either JSON objects with "source" and "target" keys
+    or two values separated by a tab. Raises ValueError or KeyError
+    for a malformed line.
+    """
+    line = line.strip()
+    if line.startswith("{"):
+        pair = json.loads(line)
+        source, target = pair["source"], pair["target"]
+        if not isinstance(source, str) or not isinstance(target, str):
+            raise ValueError("source and target must be strings")
+        return source, target
+    source, target = line.split("\t")
+    return source.strip(), target.strip()
+
+
+def resolve(value):
+    """
+    Returns the person_id for an IMDB id or a name, without asking
+    the user. Raises ValueError if the person is missing or ambiguous.
+    """
+    if value in degrees.people:
+        return value
+    person_ids = sorted(degrees.names.get(value.lower(), ()))
+    if len(person_ids) == 1:
+        return person_ids[0]
+    elif not person_ids:
+        raise ValueError(degrees.not_found_message(value))
+    raise ValueError(f"ambiguous name {value}: {', '.join(person_ids)}")
+
+
+def answer(line, bidirectional=False, stats=False):
+    """
+    Answers the query on one input line as a JSON serializable dict,
+    including the search statistics if `stats` is True.
+    """
+    result = {"query": line.strip()}
+    try:
+        source, target = parse_pair(line)
+        result["source"], result["target"] = source, target
+        source, target = resolve(source), resolve(target)
+    except (ValueError, KeyError) as error:
+        result["error"] = str(error)
+        return result
+
+    collector = SearchStats() if stats else None
+    path = degrees.shortest_path(source, target, bidirectional=bidirectional,
+                                 stats=collector)
+    result["source_id"], result["target_id"] = source, target
+    result["degrees"] = None if path is None else len(path)
+    result["path"] = path
+    if collector is not None:
+        result["stats"] = collector.to_dict()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer many degrees queries against one loaded graph."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("pairs", nargs="?", default="-",
+                        help="file of query pairs, - for stdin")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--bidirectional", action="store_true")
+    parser.add_argument("--stats", action="store_true",
+                        help="include search statistics in each answer")
+    args = parser.parse_args()
+
+    # Load the graph once; forked workers share it copy-on-write
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory)
+    print("Data loaded.", file=sys.stderr)
+
+    pairs = sys.stdin if args.pairs == "-" else open(args.pairs,
+                                                     encoding="utf-8")
+    lines = (line for line in pairs if line.strip())
+    search = functools.partial(answer, bidirectional=args.bidirectional,
+                               stats=args.stats)
+
+    with pairs:
+        if args.workers <= 1:
+            for result in map(search, lines):
+                print(json.dumps(result), flush=True)
+            return
+
+        # Without fork every worker has to load the data itself
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+            initializer, initargs = None, ()
+        else:
+            context = multiprocessing.get_context()
+            initializer, initargs = degrees.load_data, (args.directory,)
+
+        with context.Pool(args.workers, initializer, initargs) as pool:
+            for result in pool.imap(search, lines, chunksize=64):
+                print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
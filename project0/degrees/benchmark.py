@@ -0,0 +1,47 @@
+import random
+import sys
+
+import degrees
+from stats import SearchStats
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark.py [directory] [pairs]")
+    directory = sys.argv[1] if len(sys.argv) > 1 else "large"
+    pairs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    # Pick random pairs of people with a fixed seed so runs compare
+    rng = random.Random(0)
+    person_ids = sorted(degrees.people)
+    index = degrees.load_landmarks(directory)
+    modes = {
+        "one-sided": {},
+        "bidirectional": {"bidirectional": True},
+        "landmark A*": {"index": index},
+    }
+    totals = {mode: SearchStats() for mode in modes}
+
+    for _ in range(pairs):
+        source, target = rng.choice(person_ids), rng.choice(person_ids)
+        lengths = set()
+        for mode, options in modes.items():
+            path = degrees.shortest_path(source, target,
+                                         stats=totals[mode], **options)
+            lengths.add(None if path is None else len(path))
+        if len(lengths) != 1:
+            sys.exit(f"Path lengths differ for {source} -> {target}")
+
+    for mode, stats in totals.items():
+        print(f"{mode:>14}: "
+              f"{stats.nodes_expanded / pairs:12.1f} expansions/query, "
+              f"{1000 * stats.timings['search'] / pairs:10.3f} ms/query, "
+              f"frontier peak {stats.frontier_peak}")
+
+
+if __name__ == "__main__":
+    main()
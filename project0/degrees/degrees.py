@@ -1,30 +1,49 @@
 import csv
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import Graph
+from landmarks import LandmarkIndex
+from nameindex import NameIndex
+from snapshot import read_snapshot, write_snapshot
+from stats import SearchStats, phase
 
 # Maps names to a set of corresponding person_ids
 names = {}
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
+# Maps person_ids to a dictionary of: name, birth
 people = {}
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
+# Maps movie_ids to a dictionary of: title, year
 movies = {}
 
+# Integer-indexed star graph linking people and movies
+graph = Graph()
 
-def load_data(directory):
+# Sorted index over the keys of names for prefix and fuzzy lookups
+name_index = NameIndex()
+
+# Command line flags understood by main
+FLAGS = {"--bidirectional", "--build-snapshot", "--landmarks", "--stats"}
+
+
+def load_data(directory, snapshot=True):
     """
     Load data from CSV files into memory.
+
+    If `snapshot` is True and the directory has a snapshot that is
+    still current with its CSV files, load that instead.
     """
+    if snapshot and read_snapshot(directory, names, people, movies, graph):
+        name_index.build(names)
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
             people[row["id"]] = {
                 "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
+                "birth": row["birth"]
             }
             if row["name"].lower() not in names:
                 names[row["name"].lower()] = {row["id"]}
@@ -37,39 +56,66 @@ def load_data(directory):
         for row in reader:
             movies[row["id"]] = {
                 "title": row["title"],
-                "year": row["year"],
-                "stars": set()
+                "year": row["year"]
             }
 
-    # Load stars
+    # Load stars into the compact graph
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+        reader = csv.reader(f)
+        header = next(reader)
+        person, movie = header.index("person_id"), header.index("movie_id")
+        graph.build(people, movies, ((row[person], row[movie])
+                                     for row in reader))
+
+    name_index.build(names)
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    # Split command line flags from positional arguments
+    flags = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) > 1 or any(flag not in FLAGS for flag in flags):
+        sys.exit("Usage: python degrees.py "
+                 "[--bidirectional] [--build-snapshot] [--landmarks] "
+                 "[--stats] [directory]")
+    directory = args[0] if len(args) == 1 else "large"
+
+    # Parse the CSV files once and save them for later runs
+    if "--build-snapshot" in flags:
+        print("Loading data...")
+        load_data(directory, snapshot=False)
+        path = write_snapshot(directory, names, people, movies, graph)
+        print(f"Snapshot written to {path}.")
+        return
+
+    # Only collect statistics when asked to
+    stats = SearchStats() if "--stats" in flags else None
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    with phase(stats, "load"):
+        load_data(directory)
+
+        # Reuse the saved landmark index, building it on first use
+        index = None
+        if "--landmarks" in flags:
+            index = load_landmarks(directory)
     print("Data loaded.")
 
-    source = person_id_for_name(input("Name: "))
+    name = input("Name: ")
+    with phase(stats, "lookup"):
+        source = person_id_for_name(name)
     if source is None:
-        sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+        sys.exit(not_found_message(name))
+    name = input("Name: ")
+    with phase(stats, "lookup"):
+        target = person_id_for_name(name)
     if target is None:
-        sys.exit("Person not found.")
+        sys.exit(not_found_message(name))
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target,
+                         bidirectional="--bidirectional" in flags,
+                         index=index, stats=stats)
 
     if path is None:
         print("Not connected.")
@@ -83,44 +129,103 @@ def main():
             movie = movies[path[i + 1][0]]["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
+    if stats is not None:
+        print(stats.to_json(indent=2))
+
+
+def load_landmarks(directory, count=16):
+    """
+    Returns the landmark index saved for `directory`, building and
+    saving a new one with `count` landmarks if it is missing or stale.
+    """
+    index = LandmarkIndex.load(graph, directory)
+    if index is None:
+        index = LandmarkIndex.build(graph, count)
+        index.save(directory)
+    return index
+
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, index=None,
+                  stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `bidirectional` is True the search expands from both ends
+    and meets in the middle. If a landmark `index` is given the
+    search is A* guided by its distance bounds instead. Work done
+    is added to `stats` when a SearchStats is given.
+
     If no possible path, returns None.
     """
-    # find the neighbors for source
-    neighbors = neighbors_for_person(source)
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+    with phase(stats, "search"):
+        if index is not None:
+            path = index.shortest_path(source, target, stats)
+        elif bidirectional:
+            path = graph.bidirectional_path(source, target, stats)
+        else:
+            path = graph.shortest_path(source, target, stats)
 
-    # Initialize the frontier
-    start = Node((None, source), parent=None, action=None)
-    frontier = QueueFrontier()
-    frontier.add(start)
+    # Translate the graph's indices back to IMDB ids
+    if path is None:
+        return None
+    return [(graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in path]
 
-    # Search until target is found
-    while frontier.empty() is not True:
-        node = frontier.remove()
-        frontier.explored.add(node.state)
 
-        # Check to see if the node equals the target
-        if node.state[1] == target:
-            actions = []
+def single_source(source):
+    """
+    Returns a dictionary mapping every person_id reachable from the
+    source to a (degrees, movie_id, person_id) tuple giving their
+    distance and the step they were reached through. The source maps
+    to (0, None, None).
+    """
+    graph_ids, movie_ids = graph.person_ids, graph.movie_ids
+    distances, movies, parents = graph.single_source(graph.person_index[source])
+    reached = {}
+    for person, distance in enumerate(distances):
+        if distance > 0:
+            reached[graph_ids[person]] = (distance, movie_ids[movies[person]],
+                                          graph_ids[parents[person]])
+    reached[source] = (0, None, None)
+    return reached
 
-            # If a match is found return the list of actions
-            while node.parent is not None:
-                actions.insert(0, node.state)
-                node = node.parent
-            return actions
 
-        # add all neighbors that have not been explored
-        neighbors = neighbors_for_person(node.state[1]) - frontier.explored
-        for neighbor in neighbors:
-            child = Node(neighbor, parent=node, action=None)
-            frontier.add(child)
+def separation(source, target, index, stats=None):
+    """
+    Returns the degrees of separation between the source and the
+    target using a landmark `index`, or None if they are not connected.
+    """
+    with phase(stats, "search"):
+        return index.distance(graph.person_index[source],
+                              graph.person_index[target], stats)
 
-    return None
+
+def find_people(query, limit=10):
+    """
+    Returns up to `limit` person_ids whose names match `query`
+    exactly, by prefix or with a small typo, best matches first.
+    """
+    person_ids = []
+    for name in name_index.search(query, limit):
+        person_ids.extend(sorted(names[name]))
+    return person_ids[:limit]
+
+
+def not_found_message(name):
+    """
+    Returns the message for a name with no exact match, suggesting
+    close names when there are any.
+    """
+    suggestions = []
+    for person_id in find_people(name, limit=5):
+        if people[person_id]["name"] not in suggestions:
+            suggestions.append(people[person_id]["name"])
+    if not suggestions:
+        return "Person not found."
+    return f"Person not found. Did you mean: {', '.join(suggestions)}?"
 
 
 def person_id_for_name(name):
@@ -154,11 +259,11 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
     neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
+    for movie in graph.movies_for(graph.person_index[person_id]):
+        movie_id = graph.movie_ids[movie]
+        for person in graph.stars_for(movie):
+            neighbors.add((movie_id, graph.person_ids[person]))
     return neighbors
 
 
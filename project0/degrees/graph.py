@@ -0,0 +1,278 @@
+from array import array
+from collections import deque
+
+from stats import phase
+
+
+class Graph():
+    """
+    Bipartite graph of people and the movies they starred in.
+
+    Person and movie ids are interned to dense integer indices and
+    the edges are stored twice as compressed sparse rows:
+        - `person_movies[person_offsets[p]:person_offsets[p + 1]]`
+          holds the movie indices person `p` starred in
+        - `movie_stars[movie_offsets[m]:movie_offsets[m + 1]]`
+          holds the person indices that starred in movie `m`
+    """
+
+    def __init__(self):
+        self.person_ids = []
+        self.person_index = {}
+        self.movie_ids = []
+        self.movie_index = {}
+        self.person_offsets = array("i", [0])
+        self.person_movies = array("i")
+        self.movie_offsets = array("i", [0])
+        self.movie_stars = array("i")
+
+    def build(self, person_ids, movie_ids, stars):
+        """
+        Replaces the graph with one over `person_ids` and `movie_ids`.
+        `stars` is an iterable of (person_id, movie_id) pairs; pairs
+        naming unknown ids are ignored and duplicates are dropped.
+        """
+        self.person_ids = list(person_ids)
+        self.person_index = {id: i for i, id in enumerate(self.person_ids)}
+        self.movie_ids = list(movie_ids)
+        self.movie_index = {id: i for i, id in enumerate(self.movie_ids)}
+
+        # Encode each edge as one integer so duplicates are cheap to drop
+        movie_count = len(self.movie_ids)
+        edges = set()
+        for person_id, movie_id in stars:
+            person = self.person_index.get(person_id)
+            movie = self.movie_index.get(movie_id)
+            if person is not None and movie is not None:
+                edges.add(person * movie_count + movie)
+        edges = sorted(edges)
+
+        # Edges sorted by person give the person rows directly
+        self.person_offsets = array("i", bytes(4 * (len(self.person_ids) + 1)))
+        self.person_movies = array("i", bytes(4 * len(edges)))
+        movie_degrees = array("i", bytes(4 * (movie_count + 1)))
+        for i, edge in enumerate(edges):
+            person, movie = divmod(edge, movie_count)
+            self.person_offsets[person + 1] += 1
+            self.person_movies[i] = movie
+            movie_degrees[movie + 1] += 1
+        for person in range(len(self.person_ids)):
+            self.person_offsets[person + 1] += self.person_offsets[person]
+
+        # Counting sort the same edges into the movie rows
+        for movie in range(movie_count):
+            movie_degrees[movie + 1] += movie_degrees[movie]
+        self.movie_offsets = array("i", movie_degrees)
+        self.movie_stars = array("i", bytes(4 * len(edges)))
+        for edge in edges:
+            person, movie = divmod(edge, movie_count)
+            self.movie_stars[movie_degrees[movie]] = person
+            movie_degrees[movie] += 1
+
+    def movies_for(self, person):
+        """Returns the movie indices person index `person` starred in."""
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]
+
+    def stars_for(self, movie):
+        """Returns the person indices that starred in movie index `movie`."""
+        return self.movie_stars[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]
+        ]
+
+    def single_source(self, source):
+        """
+        Runs one BFS from person index `source` over the whole graph.
+
+        Returns three arrays indexed by person: the number of hops from
+        `source` (-1 where unreachable), and the movie and person index
+        each person was first reached through (-1 for `source` and for
+        unreachable people).
+        """
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        distances = array("i", [-1]) * len(self.person_ids)
+        movies = array("i", [-1]) * len(self.person_ids)
+        parents = array("i", [-1]) * len(self.person_ids)
+        distances[source] = 0
+
+        # Every star of a movie is reached together, so each movie
+        # only needs to be scanned once
+        seen_movies = bytearray(len(self.movie_ids))
+        level, distance = [source], 0
+        while level:
+            distance += 1
+            next_level = []
+            for person in level:
+                for i in range(person_offsets[person],
+                               person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    if seen_movies[movie]:
+                        continue
+                    seen_movies[movie] = 1
+                    for j in range(movie_offsets[movie],
+                                   movie_offsets[movie + 1]):
+                        neighbor = movie_stars[j]
+                        if distances[neighbor] < 0:
+                            distances[neighbor] = distance
+                            movies[neighbor] = movie
+                            parents[neighbor] = person
+                            next_level.append(neighbor)
+            level = next_level
+        return distances, movies, parents
+
+    def distances(self, source):
+        """
+        Returns an array holding the number of hops from person index
+        `source` to every person, with -1 for people it cannot reach.
+        """
+        return self.single_source(source)[0]
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect person index `source` to `target`, or None.
+
+        Counters and the reconstruct phase are added to `stats`
+        when one is given.
+        """
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        expanded = generated = reached = peak = 0
+
+        # Search tree kept as parallel arrays indexed by person rather
+        # than one node object per reached person
+        movies = array("i", [-1]) * len(self.person_ids)
+        parents = array("i", [-1]) * len(self.person_ids)
+        parents[source] = source
+        seen_movies = bytearray(len(self.movie_ids))
+
+        path = None
+        frontier = deque([source])
+        while frontier:
+            person = frontier.popleft()
+            if person == target:
+                with phase(stats, "reconstruct"):
+                    path = self.path_to(target, movies, parents)
+                break
+
+            # Expand every co-star not already reached
+            expanded += 1
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                generated += movie_offsets[movie + 1] - movie_offsets[movie]
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    neighbor = movie_stars[j]
+                    if parents[neighbor] < 0:
+                        parents[neighbor] = person
+                        movies[neighbor] = movie
+                        frontier.append(neighbor)
+                        reached += 1
+            if len(frontier) > peak:
+                peak = len(frontier)
+
+        if stats is not None:
+            stats.record(expanded, generated, generated - reached, peak)
+        return path
+
+    @staticmethod
+    def path_to(target, movies, parents):
+        """
+        Returns the (movie, person) index pairs leading to `target`
+        in a search tree stored as movie and parent arrays.
+        """
+        path = []
+        person = target
+        while movies[person] >= 0:
+            path.append((movies[person], person))
+            person = parents[person]
+        path.reverse()
+        return path
+
+    def bidirectional_path(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie, person) index pairs that
+        connect person index `source` to `target`, searching from both
+        people at once one full level at a time, or None.
+
+        Counters and the reconstruct phase are added to `stats`
+        when one is given.
+        """
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        expanded = generated = reached = peak = 0
+        if source == target:
+            return []
+
+        # Each side maps a person index to the movie and person
+        # index that reached it from that side's root
+        movies = ({source: -1}, {target: -1})
+        parents = ({source: -1}, {target: -1})
+        frontiers = ([source], [target])
+
+        path = None
+        while frontiers[0] and frontiers[1]:
+
+            # Always expand the side with the smaller frontier
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            visited_movies, visited = movies[side], parents[side]
+            other = parents[1 - side]
+
+            # Expand the whole level so the best meeting point is kept
+            meeting = None
+            next_level = []
+            for person in frontiers[side]:
+                expanded += 1
+                for i in range(person_offsets[person],
+                               person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    generated += (movie_offsets[movie + 1]
+                                  - movie_offsets[movie])
+                    for j in range(movie_offsets[movie],
+                                   movie_offsets[movie + 1]):
+                        neighbor = movie_stars[j]
+                        if neighbor in visited:
+                            continue
+                        visited[neighbor] = person
+                        visited_movies[neighbor] = movie
+                        next_level.append(neighbor)
+                        if meeting is None and neighbor in other:
+                            meeting = neighbor
+            reached += len(next_level)
+            peak = max(peak, len(next_level) + len(frontiers[1 - side]))
+
+            if meeting is not None:
+                with phase(stats, "reconstruct"):
+                    path = self.join_paths(movies, parents, meeting)
+                break
+            frontiers = ((next_level, frontiers[1]) if side == 0
+                         else (frontiers[0], next_level))
+
+        if stats is not None:
+            stats.record(expanded, generated, generated - reached, peak)
+        return path
+
+    @staticmethod
+    def join_paths(movies, parents, meeting):
+        """
+        Joins the two halves of a bidirectional search at `meeting`
+        into a list of (movie, person) index pairs from source to target.
+        """
+        # Walk back from the meeting point to the source
+        path = []
+        person = meeting
+        while parents[0][person] != -1:
+            path.append((movies[0][person], person))
+            person = parents[0][person]
+        path.reverse()
+
+        # Walk forward from the meeting point to the target
+        person = meeting
+        while parents[1][person] != -1:
+            path.append((movies[1][person], parents[1][person]))
+            person = parents[1][person]
+        return path
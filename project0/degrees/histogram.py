@@ -0,0 +1,82 @@
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+from collections import Counter
+
+import degrees
+
+
+def distance_counts(source):
+    """
+    Returns a Counter of how many people sit at each number of
+    degrees from person index `source`, with unreachable people
+    counted under None.
+    """
+    counts = Counter(degrees.graph.distances(source))
+    counts[None] = counts.pop(-1, 0)
+    del counts[0]
+    return counts
+
+
+def histogram(sources, workers=1):
+    """
+    Returns the combined Counter of separation distances from every
+    person index in `sources`, running one BFS per source spread
+    over `workers` processes.
+    """
+    total = Counter()
+    if workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        for counts in map(distance_counts, sources):
+            total.update(counts)
+        return total
+
+    # Forked workers share the loaded graph copy-on-write
+    context = multiprocessing.get_context("fork")
+    with context.Pool(workers) as pool:
+        for counts in pool.imap_unordered(distance_counts, sources):
+            total.update(counts)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Histogram of degrees of separation in the star graph."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--source", help="name or id of one person to "
+                        "measure from instead of a random sample")
+    parser.add_argument("--samples", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory)
+    print("Data loaded.", file=sys.stderr)
+
+    graph = degrees.graph
+    if args.source is not None:
+        person_ids = sorted(degrees.names.get(args.source.lower(), ()))
+        if args.source in degrees.people:
+            person_ids = [args.source]
+        if len(person_ids) != 1:
+            sys.exit("Person not found or ambiguous.")
+        sources = [graph.person_index[person_ids[0]]]
+    else:
+        rng = random.Random(args.seed)
+        people = range(len(graph.person_ids))
+        sources = rng.sample(people, min(args.samples, len(people)))
+
+    counts = histogram(sources, args.workers)
+    unreachable = counts.pop(None, 0)
+    print(json.dumps({
+        "sources": len(sources),
+        "histogram": {str(d): counts[d] for d in sorted(counts)},
+        "unreachable": unreachable,
+    }))
+
+
+if __name__ == "__main__":
+    main()
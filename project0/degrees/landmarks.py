@@ -0,0 +1,237 @@
+import heapq
+import marshal
+import os
+import struct
+from array import array
+
+from snapshot import fingerprint
+from stats import phase
+
+# Name of the landmark index file written next to the CSV files
+LANDMARKS = "degrees.landmarks"
+
+# File starts with the magic bytes, the landmark count, the person
+# count and the length of the fingerprint block that follows
+MAGIC = b"DEGLAND1"
+HEADER = struct.Struct("<8sIIQ")
+
+# Stored distance for people a landmark cannot reach
+UNREACHABLE = 255
+
+
+class LandmarkIndex():
+    """
+    Hop distances from a few well connected "landmark" people to
+    everyone else in a Graph.
+
+    For any landmark L the triangle inequality bounds the distance
+    between people u and v from both sides:
+        |d(L, u) - d(L, v)| <= d(u, v) <= d(L, u) + d(L, v)
+    """
+
+    def __init__(self, graph, landmarks, distances):
+        self.graph = graph
+        self.landmarks = list(landmarks)
+
+        # One row of byte distances per landmark, indexed by person
+        self.distances = list(distances)
+
+    @classmethod
+    def build(cls, graph, count=16):
+        """
+        Picks `count` landmarks among the people with the most
+        co-stars and runs one BFS from each of them.
+        """
+        person_offsets, person_movies = graph.person_offsets, graph.person_movies
+        movie_offsets = graph.movie_offsets
+
+        # Rank people by the number of co-star links they have
+        def costars(person):
+            return sum(movie_offsets[movie + 1] - movie_offsets[movie] - 1
+                       for movie in person_movies[person_offsets[person]:
+                                                  person_offsets[person + 1]])
+        ranked = sorted(range(len(graph.person_ids)), key=costars, reverse=True)
+
+        # Skip hubs that sit right next to a landmark already chosen,
+        # since they would give nearly the same bounds
+        landmarks, rows = [], []
+        for person in ranked:
+            if len(landmarks) == count:
+                break
+            if any(0 <= row[person] <= 1 for row in rows):
+                continue
+            landmarks.append(person)
+            rows.append(graph.distances(person))
+
+        distances = [array("B", (UNREACHABLE if d < 0 or d >= UNREACHABLE
+                                 else d for d in row)) for row in rows]
+        return cls(graph, landmarks, distances)
+
+    def save(self, directory):
+        """
+        Writes the index next to the CSV files in `directory`
+        and returns its path.
+        """
+        sources = marshal.dumps(fingerprint(directory))
+        path = os.path.join(directory, LANDMARKS)
+        partial = path + ".tmp"
+        with open(partial, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(self.landmarks),
+                                len(self.graph.person_ids), len(sources)))
+            f.write(sources)
+            array("i", self.landmarks).tofile(f)
+            for row in self.distances:
+                row.tofile(f)
+        os.replace(partial, path)
+        return path
+
+    @classmethod
+    def load(cls, graph, directory):
+        """
+        Reads the index saved for `directory`, or returns None if there
+        is none or it no longer matches the CSV files or the graph.
+        """
+        path = os.path.join(directory, LANDMARKS)
+        try:
+            with open(path, "rb") as f:
+                magic, count, people, length = HEADER.unpack(
+                    f.read(HEADER.size)
+                )
+                if (magic != MAGIC or people != len(graph.person_ids)
+                        or marshal.loads(f.read(length))
+                        != fingerprint(directory)):
+                    return None
+
+                # Each landmark has its index and a row of distances
+                remaining = os.fstat(f.fileno()).st_size - f.tell()
+                if remaining < count * (4 + people):
+                    return None
+                landmarks = array("i")
+                landmarks.fromfile(f, count)
+                distances = []
+                for _ in range(count):
+                    row = array("B")
+                    row.fromfile(f, people)
+                    distances.append(row)
+        except (FileNotFoundError, EOFError, ValueError, TypeError,
+                struct.error):
+            return None
+        return cls(graph, landmarks, distances)
+
+    def bounds(self, source, target):
+        """
+        Returns the (lower, upper) bounds on the hops between person
+        indices `source` and `target`. Returns None if the landmarks
+        show the two people are not connected; the upper bound is None
+        if no landmark reaches both.
+        """
+        lower, upper = 0, None
+        for row in self.distances:
+            s, t = row[source], row[target]
+            if s == UNREACHABLE and t == UNREACHABLE:
+                continue
+            if s == UNREACHABLE or t == UNREACHABLE:
+                return None
+            lower = max(lower, abs(s - t))
+            if upper is None or s + t < upper:
+                upper = s + t
+        return lower, upper
+
+    def search(self, source, target, stats=None):
+        """
+        Runs A* from `source` to `target` with the landmark lower bound
+        as heuristic. Returns (distance, parents), where parents maps
+        each reached person index to the (movie, person) that reached
+        it, or None if the two people are not connected.
+
+        Counters are added to `stats` when one is given.
+        """
+        graph = self.graph
+        person_offsets, person_movies = graph.person_offsets, graph.person_movies
+        movie_offsets, movie_stars = graph.movie_offsets, graph.movie_stars
+        expanded = generated = improved = peak = 0
+        if self.bounds(source, target) is None:
+            return None
+
+        # Pair each landmark row with its distance to the target
+        rows = [(row, row[target]) for row in self.distances
+                if row[target] != UNREACHABLE]
+
+        def heuristic(person):
+            return max((abs(t - row[person]) for row, t in rows), default=0)
+
+        # Ties on f prefer the deeper node, which is closer to the target
+        costs = {source: 0}
+        parents = {source: None}
+        closed = set()
+        heap = [(heuristic(source), 0, source)]
+        found = None
+        while heap:
+            _, cost, person = heapq.heappop(heap)
+            cost = -cost
+            if person == target:
+                found = cost, parents
+                break
+            if person in closed:
+                continue
+            closed.add(person)
+            expanded += 1
+
+            cost += 1
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                generated += movie_offsets[movie + 1] - movie_offsets[movie]
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    neighbor = movie_stars[j]
+                    if cost < costs.get(neighbor, cost + 1):
+                        costs[neighbor] = cost
+                        parents[neighbor] = (movie, person)
+                        improved += 1
+                        heapq.heappush(
+                            heap, (cost + heuristic(neighbor), -cost, neighbor)
+                        )
+            if len(heap) > peak:
+                peak = len(heap)
+
+        if stats is not None:
+            stats.record(expanded, generated, generated - improved, peak)
+        return found
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect person index `source` to `target`, or None.
+
+        Counters and the reconstruct phase are added to `stats`
+        when one is given.
+        """
+        found = self.search(source, target, stats)
+        if found is None:
+            return None
+        _, parents = found
+        with phase(stats, "reconstruct"):
+            path = []
+            person = target
+            while parents[person] is not None:
+                movie, previous = parents[person]
+                path.append((movie, person))
+                person = previous
+            path.reverse()
+        return path
+
+    def distance(self, source, target, stats=None):
+        """
+        Returns the number of hops between person indices `source`
+        and `target`, or None if they are not connected. Answers
+        straight from the landmark bounds when they agree.
+        """
+        bounds = self.bounds(source, target)
+        if bounds is None:
+            return None
+        if source == target:
+            return 0
+        lower, upper = bounds
+        if lower == upper:
+            return lower
+        found = self.search(source, target, stats)
+        return None if found is None else found[0]
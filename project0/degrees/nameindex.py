@@ -0,0 +1,117 @@
+from array import array
+from bisect import bisect_left
+
+
+class NameIndex():
+    """
+    Sorted index over lowercase names supporting exact, prefix
+    and typo-tolerant lookups.
+
+    The sorted list answers prefix queries by binary search. Typo
+    tolerance uses an index from each three letter chunk of a name
+    to the names containing it. Both are built once, before any lookup,
+    so processes forked after loading share them.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.trigrams = {}
+
+    def build(self, names):
+        """Indexes every name in the `names` mapping or iterable."""
+        self.keys = sorted(names)
+        self.build_trigrams()
+
+    @staticmethod
+    def grams(name):
+        """Returns the set of trigrams of `name` padded with spaces."""
+        padded = f"  {name} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def build_trigrams(self):
+        """Builds the trigram posting lists for fuzzy lookups."""
+        trigrams = {}
+        for i, key in enumerate(self.keys):
+            for gram in self.grams(key):
+                postings = trigrams.get(gram)
+                if postings is None:
+                    postings = trigrams[gram] = array("i")
+                postings.append(i)
+        self.trigrams = trigrams
+
+    def prefix(self, query, limit=10):
+        """Returns up to `limit` indexed names starting with `query`."""
+        query = query.lower()
+        matches = []
+        i = bisect_left(self.keys, query)
+        while (i < len(self.keys) and len(matches) < limit
+               and self.keys[i].startswith(query)):
+            matches.append(self.keys[i])
+            i += 1
+        return matches
+
+    def fuzzy(self, query, max_edits=2, limit=10):
+        """
+        Returns up to `limit` indexed names within `max_edits`
+        insertions, deletions or substitutions of `query`,
+        closest first.
+        """
+        query = query.lower()
+
+        # One edit changes at most three trigrams, so any name within
+        # `max_edits` shares at least one of the query's 3k + 1 rarest
+        # trigrams; only those posting lists need scanning
+        grams = self.grams(query)
+        postings = sorted((self.trigrams.get(gram, ()) for gram in grams),
+                          key=len)
+        candidates = set()
+        for posting in postings[:3 * max_edits + 1]:
+            candidates.update(posting)
+
+        # Cheap length and shared trigram checks before edit distance
+        matches = []
+        shared = len(grams) - 3 * max_edits
+        for i in candidates:
+            key = self.keys[i]
+            if (abs(len(key) - len(query)) > max_edits
+                    or len(grams & self.grams(key)) < shared):
+                continue
+            distance = edit_distance(query, key, max_edits)
+            if distance is not None:
+                matches.append((distance, key))
+        matches.sort()
+        return [key for _, key in matches[:limit]]
+
+    def search(self, query, limit=10, max_edits=2):
+        """
+        Returns up to `limit` names ranked for `query`: an exact match
+        first, then names starting with it, then close misspellings.
+        """
+        query = query.lower()
+        ranked = self.prefix(query, limit)
+
+        # Widen the typo tolerance one edit at a time while short of names
+        for edits in range(1, max_edits + 1):
+            if len(ranked) >= limit:
+                break
+            for name in self.fuzzy(query, edits, limit):
+                if name not in ranked:
+                    ranked.append(name)
+        return ranked[:limit]
+
+
+def edit_distance(a, b, limit):
+    """
+    Returns the Levenshtein distance between `a` and `b`,
+    or None if it is greater than `limit`.
+    """
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= limit else None
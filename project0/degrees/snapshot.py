@@ -0,0 +1,133 @@
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+# Name of the snapshot file written next to the CSV files
+SNAPSHOT = "degrees.snapshot"
+
+# CSV files a snapshot is built from, in fingerprint order
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# File starts with the magic bytes and the lengths of the fingerprint
+# and metadata blocks that follow it
+MAGIC = b"DEGSNAP1"
+HEADER = struct.Struct("<8sQQ")
+
+# Graph arrays stored raw after the metadata, in this order
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars")
+
+
+def fingerprint(directory, hashes=False):
+    """
+    Returns a (name, size, mtime_ns, sha256) tuple for each CSV file
+    in `directory`. The hash is only computed when `hashes` is True.
+    """
+    result = []
+    for name in SOURCES:
+        path = os.path.join(directory, name)
+        stat = os.stat(path)
+        digest = None
+        if hashes:
+            sha = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+        result.append((name, stat.st_size, stat.st_mtime_ns, digest))
+    return tuple(result)
+
+
+def write_snapshot(directory, names, people, movies, graph):
+    """
+    Writes the loaded name index, people, movies and graph for
+    `directory` into a snapshot file and returns its path.
+    """
+    sources = marshal.dumps((sys.byteorder,
+                             fingerprint(directory, hashes=True)))
+    meta = marshal.dumps({
+        "names": {name: frozenset(ids) for name, ids in names.items()},
+        "people": people,
+        "movies": movies,
+        "person_ids": graph.person_ids,
+        "person_index": graph.person_index,
+        "movie_ids": graph.movie_ids,
+        "movie_index": graph.movie_index,
+        "lengths": [len(getattr(graph, name)) for name in ARRAYS],
+    })
+
+    # Pad the metadata so the arrays start on an 8 byte boundary
+    padding = -(HEADER.size + len(sources) + len(meta)) % 8
+    path = os.path.join(directory, SNAPSHOT)
+    partial = path + ".tmp"
+    with open(partial, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(sources), len(meta) + padding))
+        f.write(sources)
+        f.write(meta)
+        f.write(bytes(padding))
+        for name in ARRAYS:
+            array("i", getattr(graph, name)).tofile(f)
+
+    # Replace any previous snapshot atomically
+    os.replace(partial, path)
+    return path
+
+
+def read_snapshot(directory, names, people, movies, graph, verify=False):
+    """
+    Loads a snapshot for `directory` into the given dictionaries and
+    graph, memory-mapping the graph arrays.
+
+    Returns False without changing anything if there is no snapshot
+    or the CSV files changed since it was written. CSV files are
+    compared by size and modification time, and also by hash if
+    `verify` is True.
+    """
+    path = os.path.join(directory, SNAPSHOT)
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return False
+
+    # Check the header and that the snapshot still matches the CSVs;
+    # a truncated or corrupt snapshot counts as no snapshot
+    try:
+        magic, sources_length, meta_length = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            return False
+        offset = HEADER.size + sources_length
+        byteorder, sources = marshal.loads(buffer[HEADER.size:offset])
+        if byteorder != sys.byteorder:
+            return False
+        try:
+            current = fingerprint(directory, hashes=verify)
+        except FileNotFoundError:
+            return False
+        for stored, found in zip(sources, current):
+            if stored[:3] != found[:3] or (verify and stored[3] != found[3]):
+                return False
+        meta = marshal.loads(buffer[offset:offset + meta_length])
+        if offset + meta_length + 4 * sum(meta["lengths"]) > len(buffer):
+            return False
+    except (EOFError, ValueError, TypeError, KeyError, struct.error):
+        return False
+
+    names.update(meta["names"])
+    people.update(meta["people"])
+    movies.update(meta["movies"])
+    graph.person_ids = meta["person_ids"]
+    graph.person_index = meta["person_index"]
+    graph.movie_ids = meta["movie_ids"]
+    graph.movie_index = meta["movie_index"]
+
+    # Arrays are views straight into the mapped file
+    view = memoryview(buffer)
+    offset += meta_length
+    for name, length in zip(ARRAYS, meta["lengths"]):
+        setattr(graph, name, view[offset:offset + 4 * length].cast("i"))
+        offset += 4 * length
+    return True
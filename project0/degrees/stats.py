@@ -0,0 +1,81 @@
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class SearchStats():
+    """
+    Opt-in record of the work done answering degrees queries.
+
+    Searches add to the counters when handed a SearchStats, and
+    callers time their own phases (load, lookup, search, reconstruct)
+    with `phase`. Phases may nest: reconstruct is timed inside search.
+    Counters accumulate over every search recorded.
+    """
+
+    def __init__(self):
+        self.nodes_expanded = 0
+        self.neighbors_generated = 0
+        self.duplicates_suppressed = 0
+        self.frontier_peak = 0
+        self.timings = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Adds the wall time spent inside the block to phase `name`."""
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def record(self, expanded, generated, duplicates, frontier_peak):
+        """Adds the counters from one search."""
+        self.nodes_expanded += expanded
+        self.neighbors_generated += generated
+        self.duplicates_suppressed += duplicates
+        self.frontier_peak = max(self.frontier_peak, frontier_peak)
+
+    @staticmethod
+    def peak_memory():
+        """
+        Returns the peak memory use in bytes: the traced peak if
+        tracemalloc is running, otherwise the process's maximum
+        resident set size, or None if neither is available.
+        """
+        if tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[1]
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        # Linux reports kilobytes, macOS reports bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    def to_dict(self):
+        """Returns the statistics as a JSON serializable dictionary."""
+        return {
+            "nodes_expanded": self.nodes_expanded,
+            "neighbors_generated": self.neighbors_generated,
+            "duplicates_suppressed": self.duplicates_suppressed,
+            "frontier_peak": self.frontier_peak,
+            "peak_memory": self.peak_memory(),
+            "timings": dict(self.timings),
+        }
+
+    def to_json(self, **kwargs):
+        """Returns the statistics as a JSON string."""
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+def phase(stats, name):
+    """Times phase `name` on `stats`, or does nothing if it is None."""
+    return nullcontext() if stats is None else stats.phase(name)
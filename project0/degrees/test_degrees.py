@@ -0,0 +1,312 @@
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from collections import Counter
+from unittest import mock
+
+import batch
+import degrees
+import histogram
+import landmarks
+import snapshot
+from graph import Graph
+from landmarks import LandmarkIndex
+from stats import SearchStats
+from util import Node, QueueFrontier, StackFrontier
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+SMALL = os.path.join(DIRECTORY, "small")
+
+
+def setUpModule():
+    degrees.load_data(SMALL)
+
+
+def is_valid_path(source, target, path):
+    """Checks each step of a path is a movie both people starred in."""
+    person_id = source
+    for step in path:
+        if step not in degrees.neighbors_for_person(person_id):
+            return False
+        person_id = step[1]
+    return person_id == target
+
+
+class TestFrontier(unittest.TestCase):
+
+    def test_queue_is_first_in_first_out(self):
+        frontier = QueueFrontier()
+        for state in "abc":
+            frontier.add(Node(state, None, None))
+        self.assertEqual([frontier.remove().state for _ in range(3)],
+                         list("abc"))
+        self.assertTrue(frontier.empty())
+
+    def test_stack_is_last_in_first_out(self):
+        frontier = StackFrontier()
+        for state in "abc":
+            frontier.add(Node(state, None, None))
+        self.assertEqual([frontier.remove().state for _ in range(3)],
+                         list("cba"))
+
+    def test_contains_state_tracks_duplicates(self):
+        frontier = QueueFrontier()
+        frontier.add(Node("a", None, None))
+        frontier.add(Node("a", None, None))
+        frontier.remove()
+        self.assertTrue(frontier.contains_state("a"))
+        frontier.remove()
+        self.assertFalse(frontier.contains_state("a"))
+        self.assertRaises(Exception, frontier.remove)
+
+
+class TestNode(unittest.TestCase):
+
+    def test_path_from_root(self):
+        root = Node("a", None, None)
+        child = Node("b", root, 1)
+        grandchild = Node("c", child, 2)
+        self.assertEqual(grandchild.path(), [(1, "b"), (2, "c")])
+        self.assertEqual(root.path(), [])
+        self.assertFalse(hasattr(grandchild, "__dict__"))
+
+
+class TestNameIndex(unittest.TestCase):
+
+    def test_prefix(self):
+        self.assertEqual(degrees.name_index.prefix("tom"),
+                         ["tom cruise", "tom hanks"])
+
+    def test_typo(self):
+        self.assertEqual(degrees.name_index.search("kevn bacon")[0],
+                         "kevin bacon")
+        self.assertEqual(degrees.find_people("Tom Hnaks", limit=1), ["158"])
+
+    def test_exact_match_ranks_first(self):
+        self.assertEqual(degrees.name_index.search("emma watson")[0],
+                         "emma watson")
+
+    def test_trigrams_built_at_load_time(self):
+        # Workers forked after loading must not each rebuild them
+        index = degrees.name_index
+        kevin = index.keys.index("kevin bacon")
+        self.assertIn(kevin, index.trigrams[" ke"])
+
+
+class TestShortestPath(unittest.TestCase):
+
+    def test_direct_costars(self):
+        # Kevin Bacon and Tom Hanks starred in Apollo 13
+        self.assertEqual(degrees.shortest_path("102", "158"),
+                         [("112384", "158")])
+
+    def test_not_connected(self):
+        # Emma Watson shares no movies with the rest of the data
+        self.assertIsNone(degrees.shortest_path("914612", "102"))
+
+    def test_stats_are_recorded(self):
+        stats = SearchStats()
+        degrees.shortest_path("102", "144", stats=stats)
+        result = json.loads(stats.to_json())
+        self.assertGreater(result["nodes_expanded"], 0)
+        self.assertGreaterEqual(result["neighbors_generated"],
+                                result["duplicates_suppressed"])
+        self.assertGreater(result["frontier_peak"], 0)
+        self.assertIn("search", result["timings"])
+        self.assertIn("reconstruct", result["timings"])
+
+    def test_bidirectional_matches_one_sided(self):
+        for source, target in itertools.product(degrees.people, repeat=2):
+            one_sided = degrees.shortest_path(source, target)
+            both = degrees.shortest_path(source, target, bidirectional=True)
+            if one_sided is None:
+                self.assertIsNone(both)
+            else:
+                self.assertEqual(len(both), len(one_sided))
+                self.assertTrue(is_valid_path(source, target, both))
+
+
+class TestSingleSource(unittest.TestCase):
+
+    def test_distances_and_predecessors_match_paths(self):
+        for source in degrees.people:
+            reached = degrees.single_source(source)
+            for target in degrees.people:
+                path = degrees.shortest_path(source, target)
+                if path is None:
+                    self.assertNotIn(target, reached)
+                    continue
+                distance, movie_id, parent = reached[target]
+                self.assertEqual(distance, len(path))
+                if distance:
+                    self.assertEqual(reached[parent][0], distance - 1)
+                    self.assertIn((movie_id, target),
+                                  degrees.neighbors_for_person(parent))
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_matches_single_source(self):
+        sources = range(len(degrees.graph.person_ids))
+        expected = Counter()
+        for source in sources:
+            reached = degrees.single_source(degrees.graph.person_ids[source])
+            expected.update(distance for distance, _, _ in reached.values()
+                            if distance)
+            expected[None] += len(degrees.people) - len(reached)
+        self.assertEqual(histogram.histogram(sources), expected)
+        self.assertEqual(histogram.histogram(sources, workers=2), expected)
+
+
+class TestLandmarks(unittest.TestCase):
+
+    def test_astar_and_distance_match_bfs(self):
+        index = LandmarkIndex.build(degrees.graph, count=3)
+        for source, target in itertools.product(degrees.people, repeat=2):
+            path = degrees.shortest_path(source, target)
+            astar = degrees.shortest_path(source, target, index=index)
+            distance = degrees.separation(source, target, index)
+            if path is None:
+                self.assertIsNone(astar)
+                self.assertIsNone(distance)
+            else:
+                self.assertEqual(len(astar), len(path))
+                self.assertEqual(distance, len(path))
+                self.assertTrue(is_valid_path(source, target, astar))
+
+    def test_truncated_or_corrupt(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for name in snapshot.SOURCES:
+            shutil.copy(os.path.join(SMALL, name), directory)
+        index = LandmarkIndex.build(degrees.graph, count=3)
+        path = index.save(directory)
+        loaded = LandmarkIndex.load(degrees.graph, directory)
+        self.assertEqual(loaded.landmarks, index.landmarks)
+        self.assertEqual(loaded.distances, index.distances)
+
+        with open(path, "rb") as f:
+            data = f.read()
+        start = landmarks.HEADER.size
+
+        # Truncated in the header, fingerprint and rows, and a
+        # fingerprint overwritten with garbage
+        for broken in (data[:start - 1], data[:start + 10], data[:-1],
+                       data[:start] + b"\xff" * 10 + data[start + 10:]):
+            with open(path, "wb") as f:
+                f.write(broken)
+            self.assertIsNone(LandmarkIndex.load(degrees.graph, directory))
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        for name in snapshot.SOURCES:
+            shutil.copy(os.path.join(SMALL, name), self.directory)
+
+    def read(self, **kwargs):
+        self.names, self.people, self.movies = {}, {}, {}
+        self.graph = Graph()
+        return snapshot.read_snapshot(self.directory, self.names, self.people,
+                                      self.movies, self.graph, **kwargs)
+
+    def test_round_trip(self):
+        self.assertFalse(self.read())
+        snapshot.write_snapshot(self.directory, degrees.names, degrees.people,
+                                degrees.movies, degrees.graph)
+        self.assertTrue(self.read(verify=True))
+        self.assertEqual(self.people, degrees.people)
+        self.assertEqual(self.names["kevin bacon"], {"102"})
+        self.assertEqual(list(self.graph.movie_stars),
+                         list(degrees.graph.movie_stars))
+
+    def test_stale_after_csv_changes(self):
+        snapshot.write_snapshot(self.directory, degrees.names, degrees.people,
+                                degrees.movies, degrees.graph)
+        with open(os.path.join(self.directory, "stars.csv"), "a") as f:
+            f.write("102,95953\n")
+        self.assertFalse(self.read())
+
+    def test_truncated_or_corrupt(self):
+        path = snapshot.write_snapshot(self.directory, degrees.names,
+                                       degrees.people, degrees.movies,
+                                       degrees.graph)
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, sources_length, meta_length = \
+            snapshot.HEADER.unpack_from(data)
+        start = snapshot.HEADER.size
+        end = start + sources_length
+
+        # Truncated in the header, fingerprint, metadata and arrays, and
+        # a zeroed fingerprint
+        for broken in (data[:start - 1], data[:start + 10], data[:end + 10],
+                       data[:-4], data[:start] + bytes(sources_length)
+                       + data[end:]):
+            with open(path, "wb") as f:
+                f.write(broken)
+            self.assertFalse(self.read())
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_parse_pair(self):
+        self.assertEqual(batch.parse_pair("Kevin Bacon\t 158\n"),
+                         ("Kevin Bacon", "158"))
+        self.assertEqual(
+            batch.parse_pair('{"source": "102", "target": "Tom Hanks"}'),
+            ("102", "Tom Hanks")
+        )
+        for line in ("Kevin Bacon", '{"source": 102, "target": "158"}',
+                     '{"source": null, "target": "158"}', "{oops"):
+            with self.assertRaises(ValueError):
+                batch.parse_pair(line)
+        with self.assertRaises(KeyError):
+            batch.parse_pair('{"source": "102"}')
+
+    def test_resolve(self):
+        self.assertEqual(batch.resolve("158"), "158")
+        self.assertEqual(batch.resolve("Kevin Bacon"), "102")
+        self.assertEqual(batch.resolve("KEVIN BACON"), "102")
+        with self.assertRaises(ValueError):
+            batch.resolve("Nobody At All")
+        with mock.patch.dict(degrees.names, {"pat": {"158", "102"}}):
+            with self.assertRaisesRegex(ValueError, "ambiguous.*102, 158"):
+                batch.resolve("Pat")
+
+    def test_answer(self):
+        result = batch.answer("Kevin Bacon\tTom Hanks\n", stats=True)
+        self.assertEqual(result["source_id"], "102")
+        self.assertEqual(result["degrees"], 1)
+        self.assertTrue(is_valid_path("102", "158", result["path"]))
+        self.assertIn("stats", result)
+        for line in ('{"source": 102, "target": "158"}',
+                     "Kevin Bacon\tNobody At All"):
+            self.assertIn("error", batch.answer(line))
+
+    def test_workers(self):
+        lines = ["Kevin Bacon\tTom Hanks", '{"source": 102, "target": "158"}',
+                 '{"source": "Emma Watson", "target": "Dustin Hoffman"}',
+                 "Cary Elwes\tNobody At All", "102\t102"]
+        with tempfile.NamedTemporaryFile("w", suffix=".txt",
+                                         delete=False) as f:
+            f.write("\n".join(lines) + "\n")
+        self.addCleanup(os.remove, f.name)
+        output = subprocess.run(
+            [sys.executable, "batch.py", SMALL, f.name, "--workers", "2"],
+            cwd=DIRECTORY, check=True, capture_output=True, text=True,
+        ).stdout
+        results = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual(results, [json.loads(json.dumps(batch.answer(line)))
+                                   for line in lines])
+
+
+if __name__ == "__main__":
+    unittest.main()
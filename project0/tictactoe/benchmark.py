@@ -0,0 +1,85 @@
+"""
+Compare the bitboard engine against plain list-of-lists boards
+"""
+
+import copy
+import sys
+import time
+
+import bitboard
+import tictactoe as ttt
+
+
+# Reference list-of-lists engine: deep copies boards and rescans
+# every cell and line on each call
+
+def list_player(board):
+    num_x = sum(row.count(ttt.X) for row in board)
+    num_o = sum(row.count(ttt.O) for row in board)
+    return ttt.X if num_x == num_o else ttt.O
+
+
+def list_result(board, action):
+    i, j = action
+    board_copy = copy.deepcopy(board)
+    board_copy[i][j] = list_player(board)
+    return board_copy
+
+
+def list_winner(board):
+    lines = [row for row in board]
+    lines += [[board[i][j] for i in range(3)] for j in range(3)]
+    lines.append([board[i][i] for i in range(3)])
+    lines.append([board[i][2 - i] for i in range(3)])
+    for line in lines:
+        if line[0] is not ttt.EMPTY and line.count(line[0]) == 3:
+            return 1 if line[0] == ttt.X else -1
+    return 0
+
+
+def list_value(board):
+    result = list_winner(board)
+    if result or all(cell is not ttt.EMPTY for row in board for cell in row):
+        return result
+    children = [list_value(list_result(board, (i, j)))
+                for i in range(3) for j in range(3)
+                if board[i][j] is ttt.EMPTY]
+    return max(children) if list_player(board) == ttt.X else min(children)
+
+
+def timed(function, *args):
+    """Returns the result of calling `function` and the seconds it took."""
+    start = time.perf_counter()
+    value = function(*args)
+    return value, time.perf_counter() - start
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [first moves]")
+    first_moves = int(sys.argv[1]) if len(sys.argv) == 2 else 2
+
+    # Solve the game from every opening of `first_moves` moves
+    openings = [ttt.initial_state()]
+    for _ in range(first_moves):
+        openings = [ttt.result(board, action)
+                    for board in openings for action in ttt.actions(board)]
+
+    list_total = bits_total = 0.0
+    for board in openings:
+        expected, elapsed = timed(list_value, board)
+        list_total += elapsed
+        bitboard.TABLE.clear()
+        found, elapsed = timed(bitboard.value, *ttt.encode(board))
+        bits_total += elapsed
+        if found != expected:
+            sys.exit(f"Values differ on {board}")
+
+    print(f"{len(openings)} positions solved after {first_moves} moves")
+    print(f"lists:     {list_total:8.3f} s")
+    print(f"bitboards: {bits_total:8.3f} s")
+    print(f"speedup:   {list_total / bits_total:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
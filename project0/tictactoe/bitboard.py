@@ -0,0 +1,195 @@
+"""
+Tic Tac Toe positions as a pair of 9-bit integers
+"""
+
+# Cell (i, j) is bit 3 * i + j of each player's bits
+CELLS = [(i, j) for i in range(3) for j in range(3)]
+BITS = [1 << cell for cell in range(9)]
+FULL = (1 << 9) - 1
+
+# Masks of the rows, columns and diagonals
+LINES = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# WINS[bits] is True if `bits` contains a complete line
+WINS = tuple(any(bits & line == line for line in LINES)
+             for bits in range(FULL + 1))
+
+# Number of set bits in every 9-bit value
+COUNTS = tuple(bin(bits).count("1") for bits in range(FULL + 1))
+
+
+def encode(board, x, o):
+    """
+    Returns the (x, o) bits for a list-of-lists board, where `x`
+    and `o` are the marks used for each player on that board.
+    """
+    x_bits = o_bits = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == x:
+                x_bits |= BITS[3 * i + j]
+            elif cell == o:
+                o_bits |= BITS[3 * i + j]
+    return x_bits, o_bits
+
+
+def decode(x_bits, o_bits, x, o, empty):
+    """Returns the list-of-lists board for the (x, o) bits."""
+    return [[x if x_bits & BITS[cell] else o if o_bits & BITS[cell] else empty
+             for cell in range(3 * i, 3 * i + 3)] for i in range(3)]
+
+
+def x_to_move(x_bits, o_bits):
+    """Returns True if it is X's turn in the position."""
+    return COUNTS[x_bits] == COUNTS[o_bits]
+
+
+def moves(x_bits, o_bits):
+    """Returns the empty cells of the position in board order."""
+    taken = x_bits | o_bits
+    return [cell for cell in range(9) if not taken & BITS[cell]]
+
+
+def play(x_bits, o_bits, cell):
+    """Returns the position after the player to move takes `cell`."""
+    if COUNTS[x_bits] == COUNTS[o_bits]:
+        return x_bits | BITS[cell], o_bits
+    return x_bits, o_bits | BITS[cell]
+
+
+def winner(x_bits, o_bits):
+    """Returns 1 if X has a line, -1 if O has a line, 0 otherwise."""
+    if WINS[x_bits]:
+        return 1
+    if WINS[o_bits]:
+        return -1
+    return 0
+
+
+def terminal(x_bits, o_bits):
+    """Returns True if either player has a line or the board is full."""
+    return WINS[x_bits] or WINS[o_bits] or x_bits | o_bits == FULL
+
+
+def symmetries():
+    """
+    Returns, for each of the 8 rotations and reflections of the board,
+    a table mapping every 9-bit value to its image.
+    """
+    transforms = [
+        lambda i, j: (i, j), lambda i, j: (j, 2 - i),
+        lambda i, j: (2 - i, 2 - j), lambda i, j: (2 - j, i),
+        lambda i, j: (i, 2 - j), lambda i, j: (2 - i, j),
+        lambda i, j: (j, i), lambda i, j: (2 - j, 2 - i),
+    ]
+    tables = []
+    for transform in transforms:
+        images = [BITS[3 * a + b] for a, b in (transform(i, j)
+                                               for i, j in CELLS)]
+        tables.append(tuple(sum(images[cell] for cell in range(9)
+                                if bits & BITS[cell])
+                            for bits in range(FULL + 1)))
+    return tables
+
+
+SYMMETRIES = symmetries()
+
+# Try the center first, then corners, then edges
+ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# Kinds of transposition table entries
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Maps a canonical position to its (value, kind) for the side to move
+TABLE = {}
+
+
+def canonical(mine, theirs):
+    """
+    Returns one key shared by a position and all of its rotations
+    and reflections, given the bits of the side to move and the other.
+    """
+    return min((table[mine] << 9) | table[theirs] for table in SYMMETRIES)
+
+
+def negamax(mine, theirs, alpha=-1, beta=1):
+    """
+    Returns the value of the position for the side to move, given
+    that side's bits and the other side's: 1 for a win, -1 for a loss
+    and 0 for a draw. Searches with alpha-beta pruning and shares
+    results between symmetric positions through TABLE.
+    """
+    # Only the side that just moved can have completed a line
+    if WINS[theirs]:
+        return -1
+    if mine | theirs == FULL:
+        return 0
+
+    key = canonical(mine, theirs)
+    entry = TABLE.get(key)
+    if entry is not None:
+        value, kind = entry
+        if kind == EXACT:
+            return value
+        elif kind == LOWER and value >= beta:
+            return value
+        elif kind == UPPER and value <= alpha:
+            return value
+
+    original_alpha = alpha
+    best = -1
+    taken = mine | theirs
+    for cell in ORDER:
+        if taken & BITS[cell]:
+            continue
+        value = -negamax(theirs, mine | BITS[cell], -beta, -alpha)
+        if value > best:
+            best = value
+            if value > alpha:
+                alpha = value
+                if alpha >= beta:
+                    break
+
+    if best <= original_alpha:
+        TABLE[key] = (best, UPPER)
+    elif best >= beta:
+        TABLE[key] = (best, LOWER)
+    else:
+        TABLE[key] = (best, EXACT)
+    return best
+
+
+def value(x_bits, o_bits):
+    """
+    Returns the game value of the position with perfect play:
+    1 if X wins, -1 if O wins and 0 for a draw.
+    """
+    if x_to_move(x_bits, o_bits):
+        return negamax(x_bits, o_bits)
+    return -negamax(o_bits, x_bits)
+
+
+def best_move(x_bits, o_bits):
+    """
+    Returns the best cell for the player to move, preferring the
+    center, then corners, then edges among equally good moves,
+    or None if the game is over.
+    """
+    if terminal(x_bits, o_bits):
+        return None
+    mine, theirs = ((x_bits, o_bits) if x_to_move(x_bits, o_bits)
+                    else (o_bits, x_bits))
+    best, alpha = None, -2
+    for cell in ORDER:
+        if (mine | theirs) & BITS[cell]:
+            continue
+        value = -negamax(theirs, mine | BITS[cell], -1, -alpha)
+        if value > alpha:
+            best, alpha = cell, value
+            if alpha == 1:
+                break
+    return best
@@ -0,0 +1,109 @@
+"""
+Perfect play table for every reachable Tic Tac Toe position
+"""
+
+import os
+import struct
+import sys
+from array import array
+
+import bitboard
+
+# Default location of the table, next to this module
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+# File starts with the magic bytes and the number of entries. Change
+# the magic whenever best_move breaks ties differently, so that tables
+# written under the old rule are ignored rather than trusted.
+MAGIC = b"TTTBOOK1"
+HEADER = struct.Struct("<8sI")
+
+# Each entry is one 32-bit word:
+#   bits 8-25  the position, x_bits << 9 | o_bits
+#   bits 2-5   the best cell, or NO_MOVE on a finished board
+#   bits 0-1   the game value for X plus one
+NO_MOVE = 15
+
+# Bits no valid entry sets: 6-7 and everything above the position
+UNUSED = ~((1 << 26) - 1) | 0b11000000
+
+
+def positions():
+    """
+    Returns every position reachable from the empty board by legal
+    play, including finished ones, as (x_bits, o_bits) pairs.
+    """
+    seen = {(0, 0)}
+    stack = [(0, 0)]
+    while stack:
+        x_bits, o_bits = stack.pop()
+        if bitboard.terminal(x_bits, o_bits):
+            continue
+        for cell in bitboard.moves(x_bits, o_bits):
+            child = bitboard.play(x_bits, o_bits, cell)
+            if child not in seen:
+                seen.add(child)
+                stack.append(child)
+    return seen
+
+
+def generate():
+    """Returns the sorted array of packed entries for every position."""
+    entries = array("I")
+    for x_bits, o_bits in positions():
+        move = bitboard.best_move(x_bits, o_bits)
+        value = bitboard.value(x_bits, o_bits)
+        if bitboard.terminal(x_bits, o_bits):
+            value = bitboard.winner(x_bits, o_bits)
+        entries.append(((x_bits << 9 | o_bits) << 8)
+                       | (NO_MOVE if move is None else move) << 2
+                       | value + 1)
+    return array("I", sorted(entries))
+
+
+def save(entries, path=PATH):
+    """Writes packed entries to `path`."""
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(entries)))
+        entries.tofile(f)
+
+
+def load(path=PATH):
+    """
+    Returns a dictionary mapping x_bits << 9 | o_bits to the
+    (best cell, value for X) of that position, read from `path`.
+    Returns an empty dictionary if there is no table, or if it is
+    truncated, corrupt or from another version.
+    """
+    entries = array("I")
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, count = HEADER.unpack_from(data)
+    except (FileNotFoundError, struct.error):
+        return {}
+    if (magic != MAGIC
+            or len(data) != HEADER.size + count * entries.itemsize):
+        return {}
+    entries.frombytes(data[HEADER.size:])
+
+    table = {}
+    for entry in entries:
+        cell, value = (entry >> 2) & 15, (entry & 3) - 1
+        if entry & UNUSED or not (cell < 9 or cell == NO_MOVE) or value > 1:
+            return {}
+        table[entry >> 8] = (None if cell == NO_MOVE else cell, value)
+    return table
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [path]")
+    path = sys.argv[1] if len(sys.argv) == 2 else PATH
+    entries = generate()
+    save(entries, path)
+    print(f"Wrote {len(entries)} positions to {path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+m,n,k game: an m x n board where k marks in a row win
+
+Uses the same functional API as tictactoe, on a Board that keeps
+each player's marks as bits of an integer.
+"""
+
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score for a won position before the bonus for winning sooner
+WIN = 1_000_000
+
+# Boards with more cells than this only consider moves near marks
+FULL_WIDTH_LIMIT = 25
+
+
+class Board():
+    """
+    Immutable m x n board. Cell (i, j) is bit i * cols + j of `x_bits`
+    and `o_bits`; `won` is the mark that completed k in a row, if any.
+    """
+    __slots__ = ("rows", "cols", "k", "x_bits", "o_bits", "moves", "won")
+
+    def __init__(self, rows, cols, k, x_bits=0, o_bits=0, moves=0, won=None):
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.x_bits = x_bits
+        self.o_bits = o_bits
+        self.moves = moves
+        self.won = won
+
+    def __eq__(self, other):
+        return (isinstance(other, Board)
+                and self.shape() == other.shape()
+                and self.x_bits == other.x_bits
+                and self.o_bits == other.o_bits)
+
+    def __hash__(self):
+        return hash((self.shape(), self.x_bits, self.o_bits))
+
+    def __repr__(self):
+        return "\n".join(
+            "".join("X" if self.x_bits >> (i * self.cols + j) & 1 else
+                    "O" if self.o_bits >> (i * self.cols + j) & 1 else "."
+                    for j in range(self.cols))
+            for i in range(self.rows)
+        )
+
+    def shape(self):
+        return (self.rows, self.cols, self.k)
+
+    def __getitem__(self, i):
+        """Returns row `i` as a list of X, O and EMPTY, like tictactoe."""
+        return [X if self.x_bits >> (i * self.cols + j) & 1 else
+                O if self.o_bits >> (i * self.cols + j) & 1 else EMPTY
+                for j in range(self.cols)]
+
+
+class Geometry():
+    """
+    Precomputed masks for one board shape: the k-cell windows
+    through each cell and the cells near each cell.
+    """
+    cache = {}
+
+    def __init__(self, rows, cols, k):
+        self.rows, self.cols, self.k = rows, cols, k
+        self.size = rows * cols
+        self.full = (1 << self.size) - 1
+
+        # Every horizontal, vertical and diagonal run of k cells
+        self.windows = []
+        for i in range(rows):
+            for j in range(cols):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < cols:
+                        self.windows.append(sum(
+                            1 << ((i + di * s) * cols + j + dj * s)
+                            for s in range(k)
+                        ))
+        self.cell_windows = [[w for w in self.windows if w >> cell & 1]
+                             for cell in range(self.size)]
+
+        # Cells within two steps of each cell
+        self.near = []
+        for cell in range(self.size):
+            i, j = divmod(cell, cols)
+            self.near.append(sum(
+                1 << (a * cols + b)
+                for a in range(max(0, i - 2), min(rows, i + 3))
+                for b in range(max(0, j - 2), min(cols, j + 3))
+            ))
+
+        # Cells closest to the center come first when scores tie
+        center_i, center_j = (rows - 1) / 2, (cols - 1) / 2
+        self.by_center = sorted(range(self.size), key=lambda cell: (
+            abs(cell // cols - center_i) + abs(cell % cols - center_j), cell
+        ))
+        self.center_rank = [0] * self.size
+        for rank, cell in enumerate(self.by_center):
+            self.center_rank[cell] = rank
+
+        # Weight of a window holding n marks of only one player
+        self.weights = [0] + [10 ** n for n in range(k)]
+
+    @classmethod
+    def of(cls, rows, cols, k):
+        key = (rows, cols, k)
+        if key not in cls.cache:
+            cls.cache[key] = cls(rows, cols, k)
+        return cls.cache[key]
+
+    def completes(self, bits, cell):
+        """Returns True if `bits` has k in a row through `cell`."""
+        return any(bits & w == w for w in self.cell_windows[cell])
+
+    def candidates(self, mine, theirs):
+        """
+        Returns the empty cells worth trying: all of them on small
+        boards, otherwise those within two steps of a mark.
+        """
+        taken = mine | theirs
+        if taken == 0:
+            return [self.by_center[0]]
+        if self.size <= FULL_WIDTH_LIMIT:
+            return [cell for cell in self.by_center if not taken >> cell & 1]
+        near, bits = 0, taken
+        while bits:
+            low = bits & -bits
+            near |= self.near[low.bit_length() - 1]
+            bits ^= low
+        near &= ~taken
+        return [cell for cell in self.by_center if near >> cell & 1]
+
+    def evaluate(self, mine, theirs):
+        """
+        Scores a position for the side to move by its windows that
+        only one player has marks in, weighted by how full they are.
+        """
+        weights = self.weights
+        score = 0
+        for w in self.windows:
+            a, b = mine & w, theirs & w
+            if a:
+                if not b:
+                    score += weights[a.bit_count()]
+            elif b:
+                score -= weights[b.bit_count()]
+        return score
+
+
+def initial_state(rows=3, cols=3, k=3):
+    """
+    Returns starting state of a `rows` x `cols` board
+    where `k` in a row wins.
+    """
+    return Board(rows, cols, k)
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    return X if board.moves % 2 == 0 else O
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    taken = board.x_bits | board.o_bits
+    return {divmod(cell, board.cols) for cell in range(board.rows * board.cols)
+            if not taken >> cell & 1}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    Only the lines through the new mark are checked for a win.
+    """
+    i, j = action
+    if not (0 <= i < board.rows and 0 <= j < board.cols):
+        raise ValueError(f"action {action} is off the board")
+    cell = i * board.cols + j
+    if (board.x_bits | board.o_bits) >> cell & 1:
+        raise ValueError(f"cell {action} is already taken")
+
+    geometry = Geometry.of(*board.shape())
+    x_bits, o_bits = board.x_bits, board.o_bits
+    if player(board) == X:
+        x_bits |= 1 << cell
+        won = X if geometry.completes(x_bits, cell) else None
+    else:
+        o_bits |= 1 << cell
+        won = O if geometry.completes(o_bits, cell) else None
+    return Board(board.rows, board.cols, board.k, x_bits, o_bits,
+                 board.moves + 1, board.won or won)
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    return board.won
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return board.won is not None or board.moves == board.rows * board.cols
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    return {X: 1, O: -1}.get(board.won, 0)
+
+
+class Timeout(Exception):
+    """Raised inside a search when its time budget runs out."""
+
+
+class Search():
+    """
+    Depth-limited negamax with alpha-beta pruning, a transposition
+    table, killer moves and a history heuristic for move ordering.
+
+    Values are for the side to move. A win found with `depth` plies
+    left to search scores WIN + depth, so sooner wins score higher.
+    """
+
+    def __init__(self, geometry, deadline=None):
+        self.geometry = geometry
+        self.deadline = deadline
+        self.nodes = 0
+
+        # Maps (mine, theirs) to (depth, value, kind, best cell)
+        self.table = {}
+        self.killers = {}
+        self.history = {}
+
+    def ordered(self, mine, theirs, depth, first):
+        """Returns the candidate cells in the order to search them."""
+        killers = self.killers.get(depth, ())
+        history, rank = self.history, self.geometry.center_rank
+        return sorted(self.geometry.candidates(mine, theirs), key=lambda c: (
+            c != first, c not in killers, -history.get(c, 0), rank[c]
+        ))
+
+    def negamax(self, mine, theirs, depth, alpha, beta):
+        """
+        Returns the value for the side to move, given its bits and the
+        other side's, searching `depth` more plies.
+        """
+        self.nodes += 1
+        if (self.deadline is not None and self.nodes & 255 == 0
+                and time.monotonic() > self.deadline):
+            raise Timeout()
+
+        geometry = self.geometry
+        if (mine | theirs) == geometry.full:
+            return 0
+        if depth == 0:
+            return geometry.evaluate(mine, theirs)
+
+        # Only trust stored values searched to exactly this depth so
+        # the result never depends on what was searched before
+        key = (mine, theirs)
+        entry = self.table.get(key)
+        first = None
+        if entry is not None:
+            stored_depth, value, kind, first = entry
+            if stored_depth == depth:
+                if (kind == 0 or (kind == 1 and value >= beta)
+                        or (kind == 2 and value <= alpha)):
+                    return value
+
+        original_alpha = alpha
+        best, best_cell = -2 * WIN, None
+        for cell in self.ordered(mine, theirs, depth, first):
+            bits = mine | 1 << cell
+            if geometry.completes(bits, cell):
+                value = WIN + depth
+            else:
+                value = -self.negamax(theirs, bits, depth - 1, -beta, -alpha)
+            if value > best:
+                best, best_cell = value, cell
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        self.cutoff(cell, depth)
+                        break
+
+        if best <= original_alpha:
+            kind = 2
+        elif best >= beta:
+            kind = 1
+        else:
+            kind = 0
+        self.table[key] = (depth, best, kind, best_cell)
+        return best
+
+    def cutoff(self, cell, depth):
+        """Remembers a move that caused a beta cutoff."""
+        killers = self.killers.setdefault(depth, [])
+        if cell not in killers:
+            killers.insert(0, cell)
+            del killers[2:]
+        self.history[cell] = self.history.get(cell, 0) + depth * depth
+
+    def root_order(self, mine, theirs, first=None):
+        """
+        Returns the root moves in search order: `first`, then by
+        distance to the center. Unlike inner nodes this ignores killers
+        and history so every search of a position agrees on it.
+        """
+        cells = self.geometry.candidates(mine, theirs)
+        if first in cells:
+            cells.remove(first)
+            cells.insert(0, first)
+        return cells
+
+    def root(self, mine, theirs, depth, first=None):
+        """
+        Searches every root move to `depth` plies and returns the best
+        (cell, value). Among equal values the earlier move in
+        root_order wins.
+        """
+        alpha, best = -2 * WIN, None
+        for cell in self.root_order(mine, theirs, first):
+            bits = mine | 1 << cell
+            if self.geometry.completes(bits, cell):
+                value = WIN + depth
+            else:
+                value = -self.negamax(theirs, bits, depth - 1,
+                                      -2 * WIN, -alpha)
+            if best is None or value > alpha:
+                best, alpha = cell, value
+        return best, alpha
+
+
+def sides(board):
+    """Returns the (mine, theirs) bits for the player to move."""
+    if player(board) == X:
+        return board.x_bits, board.o_bits
+    return board.o_bits, board.x_bits
+
+
+def minimax(board, time_limit=1.0, max_depth=None):
+    """
+    Returns the best action for the current player on the board found
+    by iterative deepening within `time_limit` seconds (no limit if
+    None) and at most `max_depth` plies. Returns None if the game is
+    over.
+    """
+    if terminal(board):
+        return None
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    geometry = Geometry.of(*board.shape())
+    search = Search(geometry, deadline)
+    mine, theirs = sides(board)
+
+    # Deepen one ply at a time, keeping the last completed answer and
+    # trying it first in the next iteration
+    best = geometry.candidates(mine, theirs)[0]
+    empty = board.rows * board.cols - board.moves
+    limit = empty if max_depth is None else min(max_depth, empty)
+    for depth in range(1, limit + 1):
+        try:
+            best, value = search.root(mine, theirs, depth, best)
+        except Timeout:
+            break
+        if abs(value) > WIN // 2:
+            break
+    return divmod(best, board.cols)
@@ -0,0 +1,143 @@
+"""
+Root-split parallel search for m,n,k games
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import mnk
+
+# Best root value found so far in the current iteration, shared by
+# every worker so later root moves are searched with a tighter window
+ALPHA = None
+
+# Each worker keeps one search, and its transposition table, per pool
+SEARCH = None
+
+
+def initializer(alpha):
+    global ALPHA
+    ALPHA = alpha
+
+
+def search_move(shape, mine, theirs, cell, depth, deadline):
+    """
+    Returns the (value, nodes) of playing root move `cell` searched to
+    `depth` plies. Values are exact when they reach the shared alpha,
+    otherwise they are upper bounds below it.
+    """
+    global SEARCH
+    geometry = mnk.Geometry.of(*shape)
+    if SEARCH is None or SEARCH.geometry is not geometry:
+        SEARCH = mnk.Search(geometry)
+    SEARCH.deadline = deadline
+    nodes = SEARCH.nodes
+
+    bits = mine | 1 << cell
+    if geometry.completes(bits, cell):
+        value = mnk.WIN + depth
+    else:
+        # Searching from one below alpha keeps moves that tie the best
+        # exact, so the earliest of them can be picked like the serial
+        # search does
+        alpha = ALPHA.value
+        value = -SEARCH.negamax(theirs, bits, depth - 1,
+                                -2 * mnk.WIN, -(alpha - 1))
+    with ALPHA.get_lock():
+        if value > ALPHA.value:
+            ALPHA.value = value
+    return value, SEARCH.nodes - nodes
+
+
+def minimax(board, time_limit=1.0, max_depth=None, workers=None):
+    """
+    Returns the same action as mnk.minimax for a fixed `max_depth`,
+    searching the root moves of each iteration on `workers` processes.
+    The first root move is searched alone to set alpha before the
+    rest are shared out. Returns None if the game is over.
+    """
+    action, _ = search(board, time_limit, max_depth, workers)
+    return action
+
+
+def search(board, time_limit=1.0, max_depth=None, workers=None):
+    """Returns the action chosen by minimax and the nodes searched."""
+    if mnk.terminal(board):
+        return None, 0
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    geometry = mnk.Geometry.of(*board.shape())
+    root = mnk.Search(geometry)
+    mine, theirs = mnk.sides(board)
+
+    best = geometry.candidates(mine, theirs)[0]
+    empty = board.rows * board.cols - board.moves
+    limit = empty if max_depth is None else min(max_depth, empty)
+    alpha = multiprocessing.Value("q", 0)
+    total = 0
+    with ProcessPoolExecutor(workers, initializer=initializer,
+                             initargs=(alpha,)) as pool:
+        for depth in range(1, limit + 1):
+            cells = root.root_order(mine, theirs, best)
+            alpha.value = -2 * mnk.WIN
+
+            def submit(cell):
+                return pool.submit(search_move, board.shape(), mine, theirs,
+                                   cell, depth, deadline)
+
+            futures = [submit(cells[0])]
+            try:
+                futures[0].result()
+                futures += [submit(cell) for cell in cells[1:]]
+                results = [future.result() for future in futures]
+            except mnk.Timeout:
+                for future in futures:
+                    future.cancel()
+                break
+
+            values = [value for value, _ in results]
+            total += sum(nodes for _, nodes in results)
+            value = max(values)
+            best = cells[values.index(value)]
+            if abs(value) > mnk.WIN // 2:
+                break
+    return divmod(best, board.cols), total
+
+
+def opening(rows, cols, k, moves):
+    """Returns a board after `moves` deterministic opening moves."""
+    board = mnk.initial_state(rows, cols, k)
+    for _ in range(moves):
+        board = mnk.result(board, mnk.minimax(board, None, max_depth=1))
+    return board
+
+
+def main():
+    if len(sys.argv) not in (1, 5):
+        sys.exit("Usage: python parallel.py [rows cols k depth]")
+    rows, cols, k, depth = map(int, sys.argv[1:]) if len(sys.argv) == 5 \
+        else (9, 9, 5, 4)
+    board = opening(rows, cols, k, 4)
+    print(board)
+
+    start = time.perf_counter()
+    expected = mnk.minimax(board, time_limit=None, max_depth=depth)
+    serial = time.perf_counter() - start
+    print(f"serial:     {serial:8.3f} s  move {expected}")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        found, nodes = search(board, None, depth, workers)
+        elapsed = time.perf_counter() - start
+        if found != expected:
+            sys.exit(f"{workers} workers chose {found}, not {expected}")
+        print(f"{workers:2} workers: {elapsed:8.3f} s  {nodes:9} nodes  "
+              f"speedup {serial / elapsed:5.2f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
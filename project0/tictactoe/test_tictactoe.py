@@ -0,0 +1,329 @@
+import importlib.util
+import os
+import tempfile
+import threading
+import time
+import unittest
+from array import array
+from unittest import mock
+
+try:
+    import pygame
+except ImportError:
+    pygame = None
+
+import bitboard
+import book
+import mnk
+import parallel
+from worker import AIWorker
+import tictactoe
+from tictactoe import (X, O, EMPTY, initial_state, player, actions, result,
+                       winner, terminal, utility, minimax)
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_runner():
+    """
+    Imports runner.py under a dummy video driver, so no window opens;
+    its fonts are found relative to this directory.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    spec = importlib.util.spec_from_file_location(
+        "tictactoe_runner", os.path.join(DIRECTORY, "runner.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    cwd = os.getcwd()
+    os.chdir(DIRECTORY)
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+    return module
+
+
+class TestBitboardAdapters(unittest.TestCase):
+
+    def test_round_trip(self):
+        board = [
+            [X, O, EMPTY],
+            [EMPTY, X, EMPTY],
+            [O, EMPTY, EMPTY]
+        ]
+        x_bits, o_bits = bitboard.encode(board, X, O)
+        self.assertEqual(bitboard.decode(x_bits, o_bits, X, O, EMPTY), board)
+
+    def test_player_and_actions(self):
+        board = initial_state()
+        self.assertEqual(player(board), X)
+        self.assertEqual(len(actions(board)), 9)
+        board = result(board, (1, 1))
+        self.assertEqual(player(board), O)
+        self.assertNotIn((1, 1), actions(board))
+
+    def test_result_leaves_board_unchanged(self):
+        board = initial_state()
+        new_board = result(board, (0, 2))
+        self.assertEqual(board, initial_state())
+        self.assertEqual(new_board[0][2], X)
+
+    def test_winner_terminal_utility(self):
+        board = [
+            [O, X, X],
+            [X, O, EMPTY],
+            [X, EMPTY, O]
+        ]
+        self.assertEqual(winner(board), O)
+        self.assertTrue(terminal(board))
+        self.assertEqual(utility(board), -1)
+        self.assertFalse(terminal(initial_state()))
+        self.assertIsNone(winner(initial_state()))
+
+
+class TestMinimax(unittest.TestCase):
+
+    def test_takes_the_win(self):
+        board = [
+            [X, X, EMPTY],
+            [O, O, EMPTY],
+            [EMPTY, EMPTY, EMPTY]
+        ]
+        self.assertEqual(minimax(board), (0, 2))
+
+    def test_blocks_the_loss(self):
+        board = [
+            [X, X, EMPTY],
+            [EMPTY, O, EMPTY],
+            [EMPTY, EMPTY, EMPTY]
+        ]
+        self.assertEqual(minimax(board), (0, 2))
+
+    def test_empty_board_is_a_draw(self):
+        x_bits, o_bits = bitboard.encode(initial_state(), X, O)
+        self.assertEqual(bitboard.value(x_bits, o_bits), 0)
+        self.assertIn(minimax(initial_state()), actions(initial_state()))
+
+    def test_no_action_when_game_over(self):
+        board = [
+            [X, X, X],
+            [O, O, EMPTY],
+            [EMPTY, EMPTY, EMPTY]
+        ]
+        self.assertIsNone(minimax(board))
+
+    def test_symmetric_positions_share_a_key(self):
+        corner = bitboard.encode(result(initial_state(), (0, 0)), X, O)
+        other = bitboard.encode(result(initial_state(), (2, 2)), X, O)
+        self.assertEqual(bitboard.canonical(*corner),
+                         bitboard.canonical(*other))
+
+    def test_negamax_matches_plain_minimax(self):
+        def plain(board):
+            if terminal(board):
+                return utility(board)
+            values = [plain(result(board, action))
+                      for action in actions(board)]
+            return max(values) if player(board) == X else min(values)
+
+        board = result(result(initial_state(), (0, 1)), (1, 1))
+        for action in actions(board):
+            child = result(board, action)
+            self.assertEqual(bitboard.value(*bitboard.encode(child, X, O)),
+                             plain(child))
+
+
+class TestBook(unittest.TestCase):
+
+    def test_every_reachable_position_round_trips(self):
+        entries = book.generate()
+        self.assertEqual(len(entries), 5478)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "book.bin")
+            book.save(entries, path)
+            table = book.load(path)
+        self.assertEqual(len(table), 5478)
+        self.assertEqual(table[0], (bitboard.best_move(0, 0), 0))
+        for key, (cell, value) in table.items():
+            x_bits, o_bits = key >> 9, key & bitboard.FULL
+            if cell is None:
+                self.assertTrue(bitboard.terminal(x_bits, o_bits))
+                continue
+            child = bitboard.play(x_bits, o_bits, cell)
+            self.assertEqual(bitboard.value(*child), value)
+
+    def test_missing_table_is_empty(self):
+        self.assertEqual(book.load(os.devnull + ".missing"), {})
+
+    def test_bad_table_is_empty(self):
+        entries = book.generate()
+        header = book.HEADER.pack(book.MAGIC, len(entries))
+        good = header + entries.tobytes()
+        bad_cell = array("I", entries)
+        bad_cell[0] = bad_cell[0] & ~(15 << 2) | 9 << 2
+        bad_value = array("I", entries)
+        bad_value[0] |= 3
+
+        # Truncated, garbage, written before the header existed, from
+        # another version, and with an impossible cell or value
+        for data in (good[:-1], good[:5], b"\xff" * 8, entries.tobytes(),
+                     b"TTTBOOK0" + good[8:], header + bad_cell.tobytes(),
+                     header + bad_value.tobytes()):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "book.bin")
+                with open(path, "wb") as f:
+                    f.write(data)
+                self.assertEqual(book.load(path), {})
+
+
+class TestMNK(unittest.TestCase):
+
+    def play(self, board, *moves):
+        for move in moves:
+            board = mnk.result(board, move)
+        return board
+
+    def test_matches_tictactoe_values(self):
+        board = mnk.initial_state()
+        while not mnk.terminal(board):
+            board = mnk.result(board, mnk.minimax(board, time_limit=None))
+        self.assertEqual(mnk.utility(board), 0)
+
+    def test_win_found_along_every_direction(self):
+        board = mnk.initial_state(5, 6, 4)
+        lines = [
+            [(2, 0), (2, 1), (2, 2), (2, 3)],
+            [(0, 5), (1, 5), (2, 5), (3, 5)],
+            [(0, 0), (1, 1), (2, 2), (3, 3)],
+            [(1, 5), (2, 4), (3, 3), (4, 2)],
+        ]
+        for line in lines:
+            others = [(i, j) for i in range(5) for j in range(6)
+                      if (i, j) not in line][:3]
+            moves = [cell for pair in zip(line, others) for cell in pair]
+            finished = self.play(board, *moves, line[-1])
+            self.assertEqual(mnk.winner(finished), mnk.X)
+            self.assertTrue(mnk.terminal(finished))
+            self.assertEqual(mnk.utility(finished), 1)
+
+    def test_result_checks_the_move(self):
+        board = mnk.result(mnk.initial_state(4, 4, 3), (0, 0))
+        self.assertEqual(board[0], [mnk.X, mnk.EMPTY, mnk.EMPTY, mnk.EMPTY])
+        self.assertEqual(mnk.player(board), mnk.O)
+        self.assertNotIn((0, 0), mnk.actions(board))
+        with self.assertRaises(ValueError):
+            mnk.result(board, (0, 0))
+        with self.assertRaises(ValueError):
+            mnk.result(board, (4, 0))
+
+    def test_takes_and_blocks_four_in_a_row(self):
+        board = mnk.initial_state(9, 9, 5)
+        board = self.play(board, (4, 2), (0, 0), (4, 3), (0, 8),
+                          (4, 4), (8, 0), (4, 5))
+        self.assertIn(mnk.minimax(board, time_limit=2.0), {(4, 1), (4, 6)})
+        board = self.play(board, (8, 8))
+        self.assertIn(mnk.minimax(board, time_limit=2.0), {(4, 1), (4, 6)})
+
+    def test_fixed_depth_is_deterministic(self):
+        board = self.play(mnk.initial_state(6, 6, 4), (2, 2), (3, 3))
+        moves = {mnk.minimax(board, time_limit=None, max_depth=3)
+                 for _ in range(2)}
+        self.assertEqual(len(moves), 1)
+        self.assertIsNone(mnk.minimax(self.play(
+            mnk.initial_state(1, 3, 3), (0, 0), (0, 1), (0, 2))))
+
+
+class TestParallel(unittest.TestCase):
+
+    def test_same_move_as_serial_search(self):
+        board = mnk.initial_state(6, 6, 4)
+        for move in [(2, 2), (3, 3), (2, 3)]:
+            board = mnk.result(board, move)
+        expected = mnk.minimax(board, time_limit=None, max_depth=3)
+        for workers in (1, 2):
+            self.assertEqual(parallel.minimax(board, time_limit=None,
+                                              max_depth=3, workers=workers),
+                             expected)
+
+    def test_solves_tictactoe(self):
+        board = mnk.result(mnk.initial_state(), (0, 0))
+        self.assertEqual(parallel.minimax(board, time_limit=None, workers=2),
+                         mnk.minimax(board, time_limit=None))
+
+
+class TestAIWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.worker = AIWorker()
+        self.addCleanup(self.worker.shutdown)
+
+    def wait(self):
+        """Polls the worker like the render loop until the move is ready."""
+        for _ in range(500):
+            future = self.worker.poll()
+            if future is not None:
+                return future.result()
+            time.sleep(0.01)
+        self.fail("worker never finished")
+
+    def test_reset_drops_stale_moves(self):
+        gate = threading.Event()
+        calls = []
+        self.worker.run(gate.wait)
+        self.worker.think(calls.append, "stale")
+        self.worker.reset()
+        self.assertFalse(self.worker.thinking())
+        self.worker.think(calls.append, "fresh")
+        gate.set()
+        self.wait()
+        self.assertEqual(calls, ["fresh"])
+
+    def test_move_from_worker(self):
+        board = result(initial_state(), (1, 1))
+        self.worker.think(minimax, board)
+        self.assertTrue(self.worker.thinking())
+        self.assertEqual(self.wait(), minimax(board))
+        self.assertFalse(self.worker.thinking())
+
+
+@unittest.skipIf(pygame is None, "pygame is not installed")
+class TestRunner(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.runner = load_runner()
+        cls.addClassCleanup(pygame.quit)
+
+    def setUp(self):
+        self.worker = AIWorker()
+        self.addCleanup(self.worker.shutdown)
+
+    def test_frames_keep_coming_while_the_computer_thinks(self):
+        def slow_minimax(board):
+            time.sleep(0.3)
+            return minimax(board)
+
+        board = initial_state()
+        frames = 0
+        with mock.patch.object(tictactoe, "minimax", slow_minimax):
+            while board == initial_state():
+                board = self.runner.step_ai(self.worker, board, O)
+                self.runner.screen.fill(self.runner.black)
+                pygame.display.flip()
+                self.runner.clock.tick(self.runner.FPS)
+                frames += 1
+        self.assertGreater(frames, 5)
+        self.assertEqual(board, result(initial_state(),
+                                       minimax(initial_state())))
+
+    def test_waits_for_the_user(self):
+        board = initial_state()
+        self.assertIs(self.runner.step_ai(self.worker, board, X), board)
+        self.assertIs(self.runner.step_ai(self.worker, board, None), board)
+        full = [[X, O, X], [X, O, O], [O, X, X]]
+        self.assertIs(self.runner.step_ai(self.worker, full, O), full)
+        self.assertFalse(self.worker.thinking())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Runs AI moves off the pygame event loop
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AIWorker():
+    """
+    Runs jobs one at a time on a background thread so the window keeps
+    drawing while the AI thinks.
+
+    The render loop starts a move with `think` and calls `poll` every
+    frame until the move is ready. `reset` forgets the move in progress
+    and skips every job queued before it, so a search for a finished
+    game never lands on the next one.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.generation = 0
+        self.pending = None
+
+    def run(self, function, *args):
+        """
+        Queues `function(*args)` behind earlier jobs and returns its
+        future.
+        """
+        return self.executor.submit(self.call, self.generation,
+                                    function, args)
+
+    def call(self, generation, function, args):
+        # Jobs from before the last reset are stale
+        if generation != self.generation:
+            return None
+        return function(*args)
+
+    def think(self, function, *args):
+        """Starts computing a move with `function(*args)`."""
+        self.pending = self.run(function, *args)
+
+    def thinking(self):
+        """Returns True if a move has been started but not polled."""
+        return self.pending is not None
+
+    def poll(self):
+        """
+        Returns the future of the move once it has finished, handing
+        it over to the caller, or None while it is still running.
+        """
+        future = self.pending
+        if future is None or not future.done():
+            return None
+        self.pending = None
+        return future
+
+    def reset(self):
+        """Drops the move in progress and every queued job."""
+        self.generation += 1
+        if self.pending is not None:
+            self.pending.cancel()
+            self.pending = None
+
+    def shutdown(self):
+        """Stops the thread without waiting for a running job."""
+        self.reset()
+        self.executor.shutdown(wait=False, cancel_futures=True)
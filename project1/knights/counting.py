@@ -0,0 +1,156 @@
+"""
+Exact model counting (#SAT) with component decomposition and caching
+
+Clauses use the same integer literals as sat.py. Along with the
+number of models, every count also returns, for each variable, the
+number of models in which it is true, so marginals for all variables
+come out of one search.
+"""
+
+
+def count(clauses, variables):
+    """
+    Returns the number of assignments to `variables` that satisfy
+    `clauses`, and a dictionary mapping each variable to the number
+    of those assignments in which it is true. Every variable in the
+    clauses must be among `variables`.
+    """
+    variables = set(variables)
+    result = propagate([tuple(clause) for clause in clauses], ())
+    if result is None:
+        return 0, dict.fromkeys(variables, 0)
+    rest, assigned = result
+    total, trues = count_formula(rest, variables - assigned.keys(), {})
+    for var, value in assigned.items():
+        trues[var] = total if value else 0
+    return total, trues
+
+
+def propagate(clauses, lits):
+    """
+    Makes every literal in `lits` true, then every literal forced by
+    a unit clause. Returns the clauses left undecided, simplified,
+    and a dictionary of the variables assigned, or None on a conflict.
+    """
+    assigned = {}
+    pending = list(lits)
+    while True:
+        for lit in pending:
+            var, value = abs(lit), lit > 0
+            if assigned.get(var, value) != value:
+                return None
+            assigned[var] = value
+
+        pending = []
+        simplified = []
+        for clause in clauses:
+            reduced = []
+            for lit in clause:
+                value = assigned.get(abs(lit))
+                if value is None:
+                    reduced.append(lit)
+                elif value == (lit > 0):
+                    break
+            else:
+                if not reduced:
+                    return None
+                if len(reduced) == 1:
+                    pending.append(reduced[0])
+                else:
+                    simplified.append(tuple(reduced))
+        clauses = simplified
+        if not pending:
+            return clauses, assigned
+
+
+def components(clauses):
+    """
+    Splits clauses into groups that share no variables, connecting
+    clauses through the variables they have in common.
+    """
+    parent = {}
+
+    def find(var):
+        root = var
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while var != root:
+            parent[var], var = root, parent[var]
+        return root
+
+    for clause in clauses:
+        first = find(abs(clause[0]))
+        for lit in clause[1:]:
+            other = find(abs(lit))
+            if other != first:
+                parent[other] = first
+
+    groups = {}
+    for clause in clauses:
+        groups.setdefault(find(abs(clause[0])), []).append(clause)
+    return list(groups.values())
+
+
+def count_formula(clauses, variables, cache):
+    """
+    Returns the (count, trues) of `clauses` over `variables`: the
+    product of its independent components, doubled for each variable
+    no clause mentions.
+    """
+    parts = [count_component(component, cache)
+             for component in components(clauses)]
+    mentioned = {abs(lit) for clause in clauses for lit in clause}
+    free = variables - mentioned
+
+    total = 1 << len(free)
+    for part_total, _ in parts:
+        total *= part_total
+    if total == 0:
+        return 0, dict.fromkeys(variables, 0)
+
+    # A variable's count within its component scales by the number of
+    # ways to complete every other component
+    trues = dict.fromkeys(free, total // 2)
+    for part_total, part_trues in parts:
+        scale = total // part_total
+        for var, part_count in part_trues.items():
+            trues[var] = part_count * scale
+    return total, trues
+
+
+def count_component(clauses, cache):
+    """
+    Returns the (count, trues) of one connected component over the
+    variables in its clauses, branching on its most frequent variable.
+    Components seen before, in any branch, are looked up in `cache`.
+    """
+    key = frozenset(clauses)
+    if key in cache:
+        return cache[key]
+
+    occurrences = {}
+    for clause in clauses:
+        for lit in clause:
+            occurrences[abs(lit)] = occurrences.get(abs(lit), 0) + 1
+    variables = set(occurrences)
+    var = max(sorted(occurrences), key=occurrences.get)
+
+    total = 0
+    trues = dict.fromkeys(variables, 0)
+    for lit in (var, -var):
+        result = propagate(clauses, (lit,))
+        if result is None:
+            continue
+        rest, assigned = result
+        branch_total, branch_trues = count_formula(
+            rest, variables - assigned.keys(), cache
+        )
+        total += branch_total
+        for assigned_var, value in assigned.items():
+            if value:
+                trues[assigned_var] += branch_total
+        for other, other_count in branch_trues.items():
+            trues[other] += other_count
+
+    cache[key] = (total, trues)
+    return total, trues
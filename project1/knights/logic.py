@@ -1,7 +1,111 @@
 import itertools
+import weakref
+from functools import lru_cache, wraps
+
+import counting
+from sat import Solver
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Models per batch in vectorized model checking, as a power of two
+BATCH_BITS = 16
+
+
+class Interned(type):
+    """
+    Metaclass that hash-conses sentences: constructing a sentence from
+    the same parts as a live one returns that one instead of a copy, so
+    structurally equal sentences are a single shared object. Classes
+    with `interned` false, whose sentences can change, are left alone.
+    """
+
+    def __call__(cls, *args):
+        if not cls.interned:
+            return super().__call__(*args)
+        key = cls.key(*args)
+        ref = Sentence.table.get(key)
+        sentence = None if ref is None else ref()
+        if sentence is None:
+            sentence = super().__call__(*args)
+            Sentence.intern(key, sentence)
+        return sentence
+
+
+def cached(method):
+    """
+    Caches the result of a sentence method with no arguments on the
+    sentence, until the next And.add anywhere.
+    """
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(self):
+        if self._edits != Sentence.edits:
+            self._cache = {}
+            self._edits = Sentence.edits
+        try:
+            return self._cache[name]
+        except KeyError:
+            value = self._cache[name] = method(self)
+            return value
+    return wrapper
+
+
+class Sentence(metaclass=Interned):
+
+    # Weak references to every live sentence, keyed by its class and
+    # the identity of its parts; children are interned first, so equal
+    # parts are identical. A key outlives its sentence until the next
+    # sweep, but a live sentence keeps its parts and their ids alive.
+    table = {}
+    sweep_at = 1024
+    interned = True
+
+    # Number of And.add calls so far; caches filled before the latest
+    # one are stale, since the edited sentence may be a descendant
+    edits = 0
+    _edits = -1
+
+    @staticmethod
+    def intern(key, sentence):
+        """
+        Records `sentence` under `key`, dropping the entries of dead
+        sentences whenever the table has doubled since the last sweep.
+        """
+        table = Sentence.table
+        table[key] = weakref.ref(sentence)
+        if len(table) >= Sentence.sweep_at:
+            for dead in [k for k, ref in table.items() if ref() is None]:
+                del table[dead]
+            Sentence.sweep_at = max(1024, 2 * len(table))
 
+    @classmethod
+    def key(cls, *parts):
+        """
+        Returns the interning key for a sentence of `parts`. Parts are
+        validated by __init__ before anything is interned under it.
+        """
+        return (cls, *map(id, parts))
 
-class Sentence():
+    def parts(self):
+        """Returns the tuple of immediate subsentences."""
+        return ()
+
+    def __eq__(self, other):
+        return self is other or (type(self) is type(other)
+                                 and self.parts() == other.parts())
+
+    def __reduce__(self):
+        # Rebuild through the intern table; the caches hold hashes that
+        # depend on the process
+        return type(self), self.parts()
+
+    @cached
+    def __hash__(self):
+        return hash((type(self).__name__, self.parts()))
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,7 +117,49 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_set())
+
+    @cached
+    def symbol_set(self):
+        """Returns the frozenset of all symbols in the logical sentence."""
+        return frozenset().union(*(part.symbol_set()
+                                   for part in self.parts()))
+
+    def expression(self, index):
+        """
+        Returns Python source for the sentence's truth value in a model
+        packed into the integer `m`, where symbol `name` is bit
+        `index[name]`.
+        """
+        raise Exception("nothing to compile")
+
+    def evaluate_batch(self, columns):
+        """
+        Evaluates the sentence on a batch of models at once, given a
+        NumPy boolean array (or scalar) of each symbol's truth values.
+        """
+        raise Exception("nothing to evaluate")
+
+    def encode(self, cnf):
+        """
+        Adds clauses defining the sentence to `cnf` and returns the
+        literal that is true exactly when the sentence is.
+        """
+        raise Exception("nothing to encode")
+
+    def compile(self, index):
+        """
+        Returns a function from a model packed into an integer, as in
+        `expression`, to the sentence's truth value.
+        """
+        try:
+            return evaluator(self.expression(index))
+        except (SyntaxError, RecursionError, MemoryError):
+            # Too deeply nested for the compiler; walk the sentence
+            bits = list(index.items())
+            return lambda m: self.evaluate(
+                {name: m >> bit & 1 for name, bit in bits}
+            )
 
     @classmethod
     def validate(cls, sentence):
@@ -47,11 +193,12 @@ class Symbol(Sentence):
     def __init__(self, name):
         self.name = name
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    @classmethod
+    def key(cls, name):
+        return (cls, name)
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def parts(self):
+        return (self.name,)
 
     def __repr__(self):
         return self.name
@@ -65,8 +212,24 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    @cached
+    def symbol_set(self):
+        return frozenset((self.name,))
+
+    def expression(self, index):
+        try:
+            return f"(m & {1 << index[self.name]})"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def evaluate_batch(self, columns):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def encode(self, cnf):
+        return cnf.symbol(self.name)
 
 
 class Not(Sentence):
@@ -74,11 +237,8 @@ class Not(Sentence):
         Sentence.validate(operand)
         self.operand = operand
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
-
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def parts(self):
+        return (self.operand,)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +246,32 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    @cached
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def expression(self, index):
+        return f"(not {self.operand.expression(index)})"
+
+    def evaluate_batch(self, columns):
+        return ~self.operand.evaluate_batch(columns)
+
+    def encode(self, cnf):
+        return -cnf.literal(self.operand)
 
 
 class And(Sentence):
+
+    # Conjunctions can grow with add, so equal ones are not shared
+    interned = False
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    def parts(self):
+        return tuple(self.conjuncts)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,20 +280,40 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        """Adds a conjunct in place."""
         Sentence.validate(conjunct)
         self.conjuncts.append(conjunct)
+        Sentence.edits += 1
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    @cached
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def expression(self, index):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(conjunct.expression(index)
+                                  for conjunct in self.conjuncts) + ")"
+
+    def evaluate_batch(self, columns):
+        result = np.True_
+        for conjunct in self.conjuncts:
+            result = result & conjunct.evaluate_batch(columns)
+        return result
+
+    def encode(self, cnf):
+        lits = [cnf.literal(conjunct) for conjunct in self.conjuncts]
+        x = cnf.new_variable()
+        for lit in lits:
+            cnf.clauses.append([-x, lit])
+        cnf.clauses.append([x] + [-lit for lit in lits])
+        return x
 
 
 class Or(Sentence):
@@ -136,13 +322,8 @@ class Or(Sentence):
             Sentence.validate(disjunct)
         self.disjuncts = list(disjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    def parts(self):
+        return tuple(self.disjuncts)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,14 +332,32 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    @cached
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def expression(self, index):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(disjunct.expression(index)
+                                 for disjunct in self.disjuncts) + ")"
+
+    def evaluate_batch(self, columns):
+        result = np.False_
+        for disjunct in self.disjuncts:
+            result = result | disjunct.evaluate_batch(columns)
+        return result
+
+    def encode(self, cnf):
+        lits = [cnf.literal(disjunct) for disjunct in self.disjuncts]
+        x = cnf.new_variable()
+        for lit in lits:
+            cnf.clauses.append([x, -lit])
+        cnf.clauses.append([-x] + lits)
+        return x
 
 
 class Implication(Sentence):
@@ -168,13 +367,8 @@ class Implication(Sentence):
         self.antecedent = antecedent
         self.consequent = consequent
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def parts(self):
+        return (self.antecedent, self.consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,13 +377,27 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    @cached
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def expression(self, index):
+        antecedent = self.antecedent.expression(index)
+        consequent = self.consequent.expression(index)
+        return f"(not {antecedent} or {consequent})"
+
+    def evaluate_batch(self, columns):
+        return (~self.antecedent.evaluate_batch(columns)
+                | self.consequent.evaluate_batch(columns))
+
+    def encode(self, cnf):
+        a = cnf.literal(self.antecedent)
+        b = cnf.literal(self.consequent)
+        x = cnf.new_variable()
+        cnf.clauses += [[-x, -a, b], [x, a], [x, -b]]
+        return x
 
 
 class Biconditional(Sentence):
@@ -199,13 +407,8 @@ class Biconditional(Sentence):
         self.left = left
         self.right = right
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def parts(self):
+        return (self.left, self.right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -216,48 +419,232 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    @cached
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
+    def expression(self, index):
+        left = self.left.expression(index)
+        right = self.right.expression(index)
+        return f"((not {left}) == (not {right}))"
+
+    def evaluate_batch(self, columns):
+        return (self.left.evaluate_batch(columns)
+                == self.right.evaluate_batch(columns))
+
+    def encode(self, cnf):
+        a = cnf.literal(self.left)
+        b = cnf.literal(self.right)
+        x = cnf.new_variable()
+        cnf.clauses += [[-x, -a, b], [-x, a, -b], [x, a, b], [x, -a, -b]]
+        return x
+
+
+class CNF():
+    """
+    Clauses over integer variables built from sentences by the Tseitin
+    encoding: each symbol and each compound subsentence gets a variable
+    defined to be equivalent to it. The clauses grow linearly with the
+    sentences, and every model of the symbols extends to exactly one
+    model of the clauses, so models and model counts are preserved.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.count = 0
+
+        # Maps symbol names to variables and sentences to literals
+        self.symbols = {}
+        self.literals = {}
+
+    def new_variable(self):
+        self.count += 1
+        return self.count
+
+    def symbol(self, name):
+        """Returns the variable for symbol `name`."""
+        if name not in self.symbols:
+            self.symbols[name] = self.new_variable()
+        return self.symbols[name]
+
+    def literal(self, sentence):
+        """
+        Returns the literal equivalent to `sentence`, encoding it the
+        first time; equal subsentences share one literal.
+        """
+        lit = self.literals.get(sentence)
+        if lit is None:
+            lit = sentence.encode(self)
+            self.literals[sentence] = lit
+        return lit
+
+    def add(self, sentence):
+        """Adds clauses asserting that `sentence` is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
         else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+            self.clauses.append([self.literal(sentence)])
+
+
+class KnowledgeBase():
+    """
+    Sentences known to be true, along with every model that satisfies
+    them, so that many queries can be answered from one enumeration.
+
+    Models are integers as in model_check, with symbols numbered in
+    the order they were first added. Adding a sentence filters the
+    cached models, widening them first if it brings new symbols.
+    """
+
+    def __init__(self, *sentences):
+        self.sentences = []
+        self.symbols = []
+        self.index = {}
+
+        # With no symbols there is one model, the empty one
+        self.models = [0]
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        Sentence.validate(sentence)
+
+        # Conjuncts filter the models one at a time so fewer are made
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+            return
+        for name in sorted(sentence.symbol_set() - self.index.keys()):
+            self.index[name] = len(self.symbols)
+            self.symbols.append(name)
+            self.models = widen(self.models, self.index[name])
+        self.models = list(filter(sentence.compile(self.index), self.models))
+        self.sentences.append(sentence)
+
+    def satisfiable(self):
+        """Returns True if some model makes every sentence true."""
+        return bool(self.models)
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+        models, index = self.models, self.index
+        new = sorted(query.symbol_set() - index.keys())
+        if new:
+            index = dict(index)
+            for name in new:
+                index[name] = len(index)
+                models = widen(models, index[name])
+        return all(map(query.compile(index), models))
+
+
+def widen(models, bit):
+    """Returns `models` with `bit` both unset and set in each."""
+    return models + [model | 1 << bit for model in models]
+
+
+@lru_cache(maxsize=1024)
+def evaluator(expression):
+    """
+    Returns a function of `m` computing `expression`. Sentences that
+    compile to the same source share one function.
+    """
+    return eval(f"lambda m: {expression}")
+
+
+def model_check(knowledge, query, vectorized=False):
+    """
+    Checks if knowledge base entails query. If `vectorized` is True and
+    NumPy is installed, whole batches of the truth table are evaluated
+    as arrays.
+    """
+
+    # Get all symbols in both knowledge and query, and give each a bit
+    symbols = sorted(knowledge.symbol_set() | query.symbol_set())
+    if vectorized and np is not None:
+        return batch_check(knowledge, query, symbols)
+    index = {symbol: bit for bit, symbol in enumerate(symbols)}
+
+    # Query must be true in every model, packed into an integer, where
+    # knowledge is true
+    models = filter(knowledge.compile(index), range(1 << len(symbols)))
+    return all(map(query.compile(index), models))
+
+
+def batch_check(knowledge, query, symbols):
+    """
+    Checks entailment over the truth table of `symbols` in batches of
+    at most 2 ** BATCH_BITS models, numbered as in model_check.
+    """
+    low = min(len(symbols), BATCH_BITS)
+
+    # The low bits of the model number vary within a batch and have
+    # the same columns in every batch; the high bits are constant
+    models = np.arange(1 << low)
+    columns = {symbol: (models >> bit & 1).astype(bool)
+               for bit, symbol in enumerate(symbols[:low])}
+    for batch in range(1 << (len(symbols) - low)):
+        for bit, symbol in enumerate(symbols[low:]):
+            columns[symbol] = np.bool_(batch >> bit & 1)
+
+        # A model of knowledge where query is false is a counterexample
+        if np.any(knowledge.evaluate_batch(columns)
+                  & ~query.evaluate_batch(columns)):
+            return False
+    return True
+
+
+def sat_check(knowledge, query):
+    """
+    Checks if knowledge base entails query by showing that knowledge
+    and the negation of query cannot both be true.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    lit = cnf.literal(query)
+    solver = Solver()
+    for clause in cnf.clauses:
+        if not solver.add_clause(clause):
+            return True
+    return not solver.solve([-lit])
+
+
+def model_count(knowledge):
+    """
+    Returns the number of models of knowledge's symbols in which it is
+    true, and a dictionary mapping each symbol to the number of those
+    models in which that symbol is true.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    total, trues = counting.count(cnf.clauses, range(1, cnf.count + 1))
+    return total, {name: trues[var] for name, var in cnf.symbols.items()}
+
+
+def marginals(knowledge):
+    """
+    Returns a dictionary mapping each symbol to the fraction of models
+    of knowledge in which it is true, or None if there are no models.
+    """
+    total, trues = model_count(knowledge)
+    if total == 0:
+        return None
+    return {name: count / total for name, count in trues.items()}
+
+
+def probability(knowledge, query):
+    """
+    Returns the fraction of models of knowledge in which query is true,
+    or None if knowledge has no models.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    lit = cnf.literal(query)
+    total, trues = counting.count(cnf.clauses, range(1, cnf.count + 1))
+    if total == 0:
+        return None
+    true = trues[abs(lit)] if lit > 0 else total - trues[abs(lit)]
+    return true / total
@@ -0,0 +1,318 @@
+"""
+Conflict-driven clause learning SAT solver
+
+Variables are positive integers and literals are nonzero integers:
+`v` means variable v is true and `-v` that it is false. Clauses are
+lists of literals, as in the DIMACS format.
+"""
+
+import heapq
+
+# Activity decay per conflict when choosing which variable to branch on
+DECAY = 0.95
+
+# Conflicts before the first restart, and growth factor of the limit
+RESTART_FIRST = 100
+RESTART_GROWTH = 1.5
+
+
+class Solver():
+    """
+    Incremental CDCL solver with two watched literals per clause,
+    first-UIP clause learning, non-chronological backjumping, activity
+    based branching with phase saving, and restarts.
+
+    Clauses can be added between calls to `solve`, and each call may
+    assume extra literals without adding them as clauses. Clauses
+    learned in one call are kept for the next.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.watches = {}
+        self.ok = True
+
+        # Indexed by variable; index 0 is unused
+        self.value = [None]
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.heap = []
+        self.increment = 1.0
+
+        self.model = None
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+
+    def variables(self):
+        """Returns the number of variables the solver knows of."""
+        return len(self.value) - 1
+
+    def reserve(self, var):
+        """Makes room for variables up to `var`."""
+        while len(self.value) <= var:
+            v = len(self.value)
+            self.value.append(None)
+            self.level.append(0)
+            self.reason.append(None)
+            self.activity.append(0.0)
+            self.phase.append(False)
+            self.watches[v] = []
+            self.watches[-v] = []
+            heapq.heappush(self.heap, (0.0, v))
+
+    def literal_value(self, lit):
+        """Returns True, False or None for the literal's current value."""
+        value = self.value[abs(lit)]
+        if value is None:
+            return None
+        return value if lit > 0 else not value
+
+    def add_clause(self, lits):
+        """
+        Adds a clause. Returns False if the clauses are now known to be
+        unsatisfiable, True otherwise.
+        """
+        if not self.ok:
+            return False
+        self.cancel_until(0)
+        self.reserve(max((abs(lit) for lit in lits), default=0))
+
+        # Drop duplicates and literals false at level 0; skip clauses
+        # that are tautologies or already satisfied
+        clause = []
+        for lit in lits:
+            value = self.literal_value(lit)
+            if value is True or -lit in clause:
+                return True
+            if value is None and lit not in clause:
+                clause.append(lit)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.ok = self.enqueue(clause[0], None) and self.propagate() is None
+        else:
+            self.clauses.append(clause)
+            self.watch(clause)
+        return self.ok
+
+    def watch(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def enqueue(self, lit, reason):
+        """Makes `lit` true, or returns False if it is already false."""
+        value = self.literal_value(lit)
+        if value is not None:
+            return value
+        var = abs(lit)
+        self.value[var] = lit > 0
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(lit)
+        return True
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses. Returns a clause
+        that is false under the assignment, or None.
+        """
+        value = self.value
+        while self.qhead < len(self.trail):
+            false_lit = -self.trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+            watchers = self.watches[false_lit]
+            kept = []
+            conflict = None
+            i = 0
+            while i < len(watchers):
+                clause = watchers[i]
+                i += 1
+
+                # Keep the false literal second
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                first_value = value[abs(first)]
+                if first_value is not None and first_value == (first > 0):
+                    kept.append(clause)
+                    continue
+
+                # Look for a replacement that is not false
+                for k in range(2, len(clause)):
+                    lit = clause[k]
+                    v = value[abs(lit)]
+                    if v is None or v == (lit > 0):
+                        clause[1], clause[k] = lit, false_lit
+                        self.watches[lit].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if first_value is None:
+                        self.enqueue(first, clause)
+                    else:
+                        conflict = clause
+                        kept.extend(watchers[i:])
+                        break
+            self.watches[false_lit] = kept
+            if conflict is not None:
+                self.qhead = len(self.trail)
+                return conflict
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the first-UIP clause learned from a conflict, with the
+        asserting literal first and a literal from the backjump level
+        second, and the level to backjump to.
+        """
+        current = len(self.trail_lim)
+        seen = set()
+        learnt = [None]
+        counter = 0
+        lit = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for q in (clause if lit is None else clause[1:]):
+                var = abs(q)
+                if var not in seen and self.level[var] > 0:
+                    seen.add(var)
+                    self.bump(var)
+                    if self.level[var] == current:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+
+            # Walk back to the next literal of this level in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.reason[abs(lit)]
+        learnt[0] = -lit
+
+        if len(learnt) == 1:
+            return learnt, 0
+        deepest = max(range(1, len(learnt)),
+                      key=lambda k: self.level[abs(learnt[k])])
+        learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def bump(self, var):
+        self.activity[var] += self.increment
+        if self.activity[var] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[v], v)
+                         for v in range(1, len(self.value))
+                         if self.value[v] is None]
+            heapq.heapify(self.heap)
+        elif self.value[var] is None:
+            heapq.heappush(self.heap, (-self.activity[var], var))
+
+    def cancel_until(self, level):
+        """Undoes every assignment above decision level `level`."""
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in self.trail[start:]:
+            var = abs(lit)
+            self.phase[var] = lit > 0
+            self.value[var] = None
+            self.reason[var] = None
+            heapq.heappush(self.heap, (-self.activity[var], var))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def pick(self):
+        """Returns the unassigned variable with the highest activity."""
+        while self.heap:
+            activity, var = heapq.heappop(self.heap)
+            if self.value[var] is None and -activity == self.activity[var]:
+                return var
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True and sets `model`, a list of values indexed by
+        variable, if the clauses are satisfiable with every literal
+        in `assumptions` true. Returns False otherwise.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        self.reserve(max((abs(lit) for lit in assumptions), default=0))
+        restart_limit = RESTART_FIRST
+        conflicts = 0
+        try:
+            while True:
+                conflict = self.propagate()
+                if conflict is not None:
+                    self.conflicts += 1
+                    conflicts += 1
+                    if not self.trail_lim:
+                        self.ok = False
+                        return False
+                    learnt, level = self.analyze(conflict)
+                    self.cancel_until(level)
+                    if len(learnt) == 1:
+                        self.enqueue(learnt[0], None)
+                    else:
+                        self.clauses.append(learnt)
+                        self.watch(learnt)
+                        self.enqueue(learnt[0], learnt)
+                    self.increment /= DECAY
+                    continue
+
+                if conflicts >= restart_limit:
+                    conflicts = 0
+                    restart_limit *= RESTART_GROWTH
+                    self.cancel_until(0)
+                    continue
+
+                # Decide the assumptions first, one level each
+                level = len(self.trail_lim)
+                if level < len(assumptions):
+                    lit = assumptions[level]
+                    value = self.literal_value(lit)
+                    if value is False:
+                        return False
+                    self.trail_lim.append(len(self.trail))
+                    if value is None:
+                        self.enqueue(lit, None)
+                    continue
+
+                var = self.pick()
+                if var is None:
+                    self.model = self.value[:]
+                    return True
+                self.decisions += 1
+                self.trail_lim.append(len(self.trail))
+                self.enqueue(var if self.phase[var] else -var, None)
+        finally:
+            self.cancel_until(0)
+
+
+def solve(clauses, assumptions=()):
+    """
+    Returns a satisfying model of `clauses` as a list of values indexed
+    by variable, or None if they are unsatisfiable.
+    """
+    solver = Solver()
+    for clause in clauses:
+        if not solver.add_clause(clause):
+            return None
+    return solver.model if solver.solve(assumptions) else None
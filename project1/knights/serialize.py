@@ -0,0 +1,227 @@
+"""
+Text and binary formats for logical sentences
+
+`parse` reads the syntax written by Sentence.formula. `dumps` and
+`loads` convert lists of sentences to and from a compact binary form
+that stores each distinct subsentence once, so shared subsentences
+stay shared and no deep object tree is pickled.
+"""
+
+import re
+import struct
+from array import array
+
+from logic import Symbol, Not, And, Or, Implication, Biconditional
+
+# Operators and parentheses; anything between them is a symbol name
+TOKENS = re.compile(r"(<=>|=>|¬|∧|∨|\(|\))")
+OPERATORS = {"<=>", "=>", "¬", "∧", "∨", "(", ")"}
+
+MAGIC = b"SENTDAG1"
+
+# Magic, then the number of names, nodes, child references and roots
+HEADER = struct.Struct("<8sIIII")
+
+# Node kinds in the binary format
+KINDS = (Symbol, Not, And, Or, Implication, Biconditional)
+
+
+def tokenize(text):
+    """
+    Returns the tokens of `text`: operators, parentheses and symbol
+    names, with whitespace around names removed.
+    """
+    # Splitting on a captured pattern puts the operators at odd indices
+    tokens = []
+    for i, piece in enumerate(TOKENS.split(text)):
+        if i % 2:
+            tokens.append(piece)
+        else:
+            piece = piece.strip()
+            if piece:
+                tokens.append(piece)
+    return tokens
+
+
+class Parser():
+    """
+    Recursive descent parser for formulas. From loosest to tightest
+    binding the operators are <=>, =>, ∨, ∧ and ¬; <=> and => group
+    to the right, and a chain of ∧ or ∨ becomes one And or Or.
+    """
+
+    def __init__(self, text):
+        # None marks the end of the formula
+        self.tokens = tokenize(text) + [None]
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position]
+
+    def take(self, expected=None):
+        token = self.peek()
+        if token is None or (expected is not None and token != expected):
+            found = "end of formula" if token is None else repr(token)
+            wanted = "a sentence" if expected is None else repr(expected)
+            raise ValueError(f"expected {wanted} at token {self.position}, "
+                             f"found {found}")
+        self.position += 1
+        return token
+
+    def parse(self):
+        sentence = self.biconditional()
+        if self.peek() is not None:
+            raise ValueError(f"unexpected {self.peek()!r} "
+                             f"at token {self.position}")
+        return sentence
+
+    def biconditional(self):
+        left = self.implication()
+        if self.peek() == "<=>":
+            self.take()
+            return Biconditional(left, self.biconditional())
+        return left
+
+    def implication(self):
+        antecedent = self.disjunction()
+        if self.peek() == "=>":
+            self.take()
+            return Implication(antecedent, self.implication())
+        return antecedent
+
+    def disjunction(self):
+        disjuncts = [self.conjunction()]
+        while self.peek() == "∨":
+            self.take()
+            disjuncts.append(self.conjunction())
+        return disjuncts[0] if len(disjuncts) == 1 else Or(*disjuncts)
+
+    def conjunction(self):
+        conjuncts = [self.negation()]
+        while self.peek() == "∧":
+            self.take()
+            conjuncts.append(self.negation())
+        return conjuncts[0] if len(conjuncts) == 1 else And(*conjuncts)
+
+    def negation(self):
+        token = self.take()
+        if token == "¬":
+            return Not(self.negation())
+        if token == "(":
+            sentence = self.biconditional()
+            self.take(")")
+            return sentence
+        if token in OPERATORS:
+            raise ValueError(f"unexpected {token!r} "
+                             f"at token {self.position - 1}")
+        return Symbol(token)
+
+
+def parse(text):
+    """
+    Returns the sentence written in `text` using the syntax of
+    Sentence.formula. Symbol names may contain spaces but not operators
+    or parentheses. An empty And or Or has an empty formula, which
+    could be either, so sentences containing one cannot be parsed
+    back; `dumps` and `loads` keep them.
+    """
+    return Parser(text).parse()
+
+
+def dumps(sentences):
+    """
+    Returns the binary form of a list of sentences. Nodes are written
+    children first, each distinct subsentence once.
+    """
+    names = []
+    name_index = {}
+    kinds = array("B")
+    offsets = array("I", [0])
+    children = array("I")
+    numbers = {}
+
+    kind_of = {kind: number for number, kind in enumerate(KINDS)}
+
+    def number(sentence):
+        # Iterative post-order walk so deep sentences cannot overflow
+        stack = [(sentence, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if id(node) in numbers:
+                continue
+            parts = () if isinstance(node, Symbol) else node.parts()
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((part, False) for part in reversed(parts)
+                             if id(part) not in numbers)
+                continue
+            kinds.append(kind_of[type(node)])
+            if isinstance(node, Symbol):
+                if node.name not in name_index:
+                    name_index[node.name] = len(names)
+                    names.append(node.name)
+                children.append(name_index[node.name])
+            else:
+                children.extend(numbers[id(part)] for part in parts)
+            offsets.append(len(children))
+            numbers[id(node)] = len(kinds) - 1
+        return numbers[id(sentence)]
+
+    roots = array("I", (number(sentence) for sentence in sentences))
+    encoded = [name.encode("utf-8") for name in names]
+    lengths = array("I", (len(name) for name in encoded))
+    return b"".join((
+        HEADER.pack(MAGIC, len(names), len(kinds), len(children), len(roots)),
+        lengths.tobytes(), b"".join(encoded),
+        kinds.tobytes(), offsets.tobytes(), children.tobytes(),
+        roots.tobytes(),
+    ))
+
+
+def loads(data):
+    """Returns the list of sentences in `data` written by `dumps`."""
+    magic, name_count, node_count, child_count, root_count = \
+        HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a sentence file")
+    position = HEADER.size
+
+    def read(typecode, count):
+        nonlocal position
+        values = array(typecode)
+        end = position + count * values.itemsize
+        values.frombytes(data[position:end])
+        position = end
+        return values
+
+    lengths = read("I", name_count)
+    names = []
+    for length in lengths:
+        names.append(data[position:position + length].decode("utf-8"))
+        position += length
+    kinds = read("B", node_count)
+    offsets = read("I", node_count + 1)
+    children = read("I", child_count)
+    roots = read("I", root_count)
+
+    nodes = []
+    for node, kind in enumerate(kinds):
+        start, end = offsets[node], offsets[node + 1]
+        if kind == 0:
+            nodes.append(Symbol(names[children[start]]))
+        else:
+            nodes.append(KINDS[kind](*(nodes[child]
+                                       for child in children[start:end])))
+    return [nodes[root] for root in roots]
+
+
+def dump(sentences, path):
+    """Writes the binary form of a list of sentences to `path`."""
+    with open(path, "wb") as f:
+        f.write(dumps(sentences))
+
+
+def load(path):
+    """Returns the list of sentences stored at `path`."""
+    with open(path, "rb") as f:
+        return loads(f.read())
@@ -0,0 +1,413 @@
+import itertools
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import counting
+import logic
+import sat
+import serialize
+from logic import (Symbol, Not, And, Or, Implication, Biconditional, CNF,
+                   KnowledgeBase, model_check, sat_check, model_count,
+                   marginals, probability)
+import puzzle
+
+SYMBOLS = [Symbol(name) for name in ("A is a Knight", "B", "C", "D")]
+
+
+def random_sentence(rng, depth):
+    """Returns a random sentence over SYMBOLS nested `depth` deep."""
+    if depth == 0 or rng.random() < 0.2:
+        return rng.choice(SYMBOLS)
+    kind = rng.choice((Not, And, Or, Implication, Biconditional))
+    if kind is Not:
+        return Not(random_sentence(rng, depth - 1))
+    if kind in (And, Or):
+        return kind(*(random_sentence(rng, depth - 1)
+                      for _ in range(rng.randint(1, 3))))
+    return kind(random_sentence(rng, depth - 1),
+                random_sentence(rng, depth - 1))
+
+
+def truth_table_check(knowledge, query):
+    """Reference entailment check that evaluates every model dict."""
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    for values in itertools.product((False, True), repeat=len(symbols)):
+        model = dict(zip(symbols, values))
+        if knowledge.evaluate(model) and not query.evaluate(model):
+            return False
+    return True
+
+
+class TestCompile(unittest.TestCase):
+
+    def test_matches_evaluate(self):
+        rng = random.Random(0)
+        names = sorted(symbol.name for symbol in SYMBOLS)
+        index = {name: bit for bit, name in enumerate(names)}
+        for _ in range(200):
+            sentence = random_sentence(rng, 4)
+            compiled = sentence.compile(index)
+            for m in range(1 << len(names)):
+                model = {name: bool(m >> bit & 1)
+                         for name, bit in index.items()}
+                self.assertEqual(bool(compiled(m)), sentence.evaluate(model))
+
+    def test_missing_symbol(self):
+        with self.assertRaises(Exception):
+            Symbol("E").compile({})
+
+
+class TestInterning(unittest.TestCase):
+
+    def test_equal_sentences_are_shared(self):
+        a, b = Symbol("A"), Symbol("B")
+        self.assertIs(Symbol("A"), a)
+        self.assertIs(Implication(Not(a), Or(a, b)),
+                      Implication(Not(Symbol("A")), Or(a, b)))
+        self.assertIsNot(Or(a, b), Or(b, a))
+        self.assertEqual(len({And(a, b), And(a, b), And(b, a)}), 2)
+
+    def test_symbols_returns_a_copy(self):
+        sentence = Or(Symbol("A"), Not(Symbol("B")))
+        sentence.symbols().add("C")
+        self.assertEqual(sentence.symbols(), {"A", "B"})
+        self.assertEqual(sentence.symbol_set(), frozenset({"A", "B"}))
+
+    def test_add_refreshes_caches(self):
+        a, b = Symbol("A"), Symbol("B")
+        knowledge = And(a)
+        negation = Not(knowledge)
+        self.assertEqual(negation.symbols(), {"A"})
+        old_hash = hash(knowledge)
+        knowledge.add(b)
+        self.assertEqual(negation.symbols(), {"A", "B"})
+        self.assertEqual(negation.formula(), "¬(A ∧ B)")
+        self.assertNotEqual(hash(knowledge), old_hash)
+        self.assertEqual(And(a, b), knowledge)
+        self.assertNotEqual(And(a), knowledge)
+
+    def test_conjunctions_are_independent(self):
+        a, b, c = Symbol("A"), Symbol("B"), Symbol("C")
+        first, second = And(a, b), And(a, b)
+        empty, other_empty = And(), And()
+        first.add(c)
+        empty.add(a)
+        self.assertEqual(second.formula(), "A ∧ B")
+        self.assertEqual(other_empty.conjuncts, [])
+        self.assertEqual(first, And(a, b, c))
+
+    def test_pickle_rebuilds_hashes(self):
+        # Hashes of strings differ between processes with different
+        # seeds, so cached hashes must not travel with a pickle
+        dump = ("import pickle, sys; from logic import *; "
+                "a = Symbol('A'); hash(a); hash(Not(a)); "
+                "sys.stdout.write(pickle.dumps([a, Not(a)]).hex())")
+        check = ("import pickle, sys; from logic import *; "
+                 "a, b = pickle.loads(bytes.fromhex(sys.stdin.read())); "
+                 "assert a is Symbol('A') and a in {Symbol('A')}; "
+                 "assert b in {Not(Symbol('A'))}")
+        directory = os.path.dirname(os.path.abspath(__file__))
+        data = subprocess.run(
+            [sys.executable, "-c", dump], cwd=directory, check=True,
+            capture_output=True, text=True,
+            env={**os.environ, "PYTHONHASHSEED": "1"},
+        ).stdout
+        subprocess.run(
+            [sys.executable, "-c", check], cwd=directory, check=True,
+            input=data, text=True,
+            env={**os.environ, "PYTHONHASHSEED": "2"},
+        )
+
+    def test_invalid_parts(self):
+        with self.assertRaises(TypeError):
+            Not("A")
+        with self.assertRaises(TypeError):
+            And(Symbol("A"), ["B"])
+
+
+class TestModelCheck(unittest.TestCase):
+
+    def test_matches_truth_table(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            knowledge = random_sentence(rng, 3)
+            query = random_sentence(rng, 2)
+            self.assertEqual(model_check(knowledge, query),
+                             truth_table_check(knowledge, query))
+
+    def test_puzzles(self):
+        self.assertTrue(model_check(puzzle.knowledge0, puzzle.AKnave))
+        self.assertTrue(model_check(puzzle.knowledge1, puzzle.BKnight))
+        self.assertTrue(model_check(puzzle.knowledge2, puzzle.AKnave))
+        self.assertTrue(model_check(puzzle.knowledge3, puzzle.CKnight))
+        self.assertFalse(model_check(puzzle.knowledge3, puzzle.BKnight))
+
+    def test_deeply_nested_sentence(self):
+        # Too deep to compile into one expression
+        a, b = Symbol("A"), Symbol("B")
+        sentence = a
+        for _ in range(300):
+            sentence = Not(sentence)
+        knowledge = And(sentence, Or(Not(a), b))
+        self.assertTrue(model_check(knowledge, b))
+        self.assertFalse(model_check(knowledge, Not(a)))
+        self.assertTrue(KnowledgeBase(knowledge).entails(b))
+
+    @unittest.skipIf(logic.np is None, "numpy is not installed")
+    def test_vectorized_matches_truth_table(self):
+        rng = random.Random(2)
+        for _ in range(200):
+            knowledge = random_sentence(rng, 3)
+            query = random_sentence(rng, 2)
+            self.assertEqual(model_check(knowledge, query, vectorized=True),
+                             truth_table_check(knowledge, query))
+
+    @unittest.skipIf(logic.np is None, "numpy is not installed")
+    def test_vectorized_across_batches(self):
+        symbols = [Symbol(f"s{i}") for i in range(6)]
+        chain = And(*(Implication(a, b) for a, b in zip(symbols, symbols[1:])))
+        knowledge = And(chain, symbols[0])
+        batch_bits, logic.BATCH_BITS = logic.BATCH_BITS, 2
+        try:
+            self.assertTrue(model_check(knowledge, symbols[-1], True))
+            self.assertFalse(model_check(chain, symbols[-1], True))
+            self.assertFalse(model_check(knowledge, Not(symbols[3]), True))
+        finally:
+            logic.BATCH_BITS = batch_bits
+
+
+class TestKnowledgeBase(unittest.TestCase):
+
+    def test_matches_model_check(self):
+        rng = random.Random(6)
+        for _ in range(100):
+            knowledge = random_sentence(rng, 3)
+            knowledge_base = KnowledgeBase(knowledge)
+            for _ in range(5):
+                query = random_sentence(rng, 2)
+                self.assertEqual(knowledge_base.entails(query),
+                                 model_check(knowledge, query))
+
+    def test_incremental_add(self):
+        rng = random.Random(7)
+        for _ in range(50):
+            sentences = [random_sentence(rng, 2) for _ in range(3)]
+            knowledge_base = KnowledgeBase()
+            for count, sentence in enumerate(sentences, 1):
+                knowledge_base.add(sentence)
+                query = random_sentence(rng, 2)
+                self.assertEqual(knowledge_base.entails(query),
+                                 model_check(And(*sentences[:count]), query))
+
+    def test_unknown_symbols(self):
+        a, b = Symbol("A"), Symbol("B")
+        knowledge_base = KnowledgeBase(a)
+        self.assertTrue(knowledge_base.entails(Or(a, b)))
+        self.assertFalse(knowledge_base.entails(b))
+        self.assertEqual(knowledge_base.symbols, ["A"])
+
+    def test_unsatisfiable_entails_everything(self):
+        a = Symbol("A")
+        knowledge_base = KnowledgeBase(a, Not(a))
+        self.assertFalse(knowledge_base.satisfiable())
+        self.assertTrue(knowledge_base.entails(Symbol("B")))
+
+
+class TestSat(unittest.TestCase):
+
+    def test_solver_matches_brute_force(self):
+        rng = random.Random(3)
+        for _ in range(300):
+            n = rng.randint(1, 8)
+            clauses = [[rng.choice((1, -1)) * rng.randint(1, n)
+                        for _ in range(rng.randint(1, 3))]
+                       for _ in range(rng.randint(0, 4 * n))]
+            expected = any(
+                all(any(values[abs(lit) - 1] == (lit > 0) for lit in clause)
+                    for clause in clauses)
+                for values in itertools.product((False, True), repeat=n)
+            )
+            model = sat.solve(clauses)
+            self.assertEqual(model is not None, expected)
+            if model is not None:
+                for clause in clauses:
+                    self.assertTrue(any(model[abs(lit)] == (lit > 0)
+                                        for lit in clause))
+
+    def test_incremental_with_assumptions(self):
+        solver = sat.Solver()
+        self.assertTrue(solver.add_clause([1, 2]))
+        self.assertTrue(solver.solve([-1]))
+        self.assertTrue(solver.model[2])
+        self.assertFalse(solver.solve([-1, -2]))
+        self.assertTrue(solver.add_clause([-2]))
+        self.assertTrue(solver.solve())
+        self.assertTrue(solver.model[1])
+        self.assertFalse(solver.add_clause([-1]))
+        self.assertFalse(solver.solve())
+
+    def test_tseitin_keeps_models(self):
+        rng = random.Random(4)
+        names = sorted(symbol.name for symbol in SYMBOLS)
+        for _ in range(50):
+            sentence = random_sentence(rng, 4)
+            cnf = CNF()
+            for name in names:
+                cnf.symbol(name)
+            cnf.add(sentence)
+            solver = sat.Solver()
+            for clause in cnf.clauses:
+                solver.add_clause(clause)
+            for values in itertools.product((False, True), repeat=4):
+                model = dict(zip(names, values))
+                assumptions = [cnf.symbols[name] * (1 if value else -1)
+                               for name, value in model.items()]
+                self.assertEqual(solver.solve(assumptions),
+                                 sentence.evaluate(model))
+
+    def test_matches_model_check(self):
+        rng = random.Random(5)
+        for _ in range(300):
+            knowledge = random_sentence(rng, 3)
+            query = random_sentence(rng, 2)
+            self.assertEqual(sat_check(knowledge, query),
+                             model_check(knowledge, query))
+
+    def test_beyond_the_truth_table(self):
+        symbols = [Symbol(f"s{i}") for i in range(200)]
+        knowledge = And(symbols[0], *(Implication(a, b) for a, b
+                                      in zip(symbols, symbols[1:])))
+        self.assertTrue(sat_check(knowledge, symbols[-1]))
+        self.assertFalse(sat_check(knowledge, Not(symbols[-1])))
+
+
+class TestModelCount(unittest.TestCase):
+
+    def test_clauses_match_brute_force(self):
+        rng = random.Random(8)
+        for _ in range(300):
+            n = rng.randint(1, 8)
+            clauses = [[rng.choice((1, -1)) * rng.randint(1, n)
+                        for _ in range(rng.randint(1, 3))]
+                       for _ in range(rng.randint(0, 3 * n))]
+            models = [values for values in
+                      itertools.product((False, True), repeat=n)
+                      if all(any(values[abs(lit) - 1] == (lit > 0)
+                                 for lit in clause) for clause in clauses)]
+            total, trues = counting.count(clauses, range(1, n + 1))
+            self.assertEqual(total, len(models))
+            for var in range(1, n + 1):
+                self.assertEqual(trues[var],
+                                 sum(values[var - 1] for values in models))
+
+    def test_sentences_match_knowledge_base(self):
+        rng = random.Random(9)
+        for _ in range(100):
+            knowledge = random_sentence(rng, 4)
+            knowledge_base = KnowledgeBase(knowledge)
+            total, trues = model_count(knowledge)
+            self.assertEqual(total, len(knowledge_base.models))
+            for name, bit in knowledge_base.index.items():
+                self.assertEqual(trues[name], sum(
+                    model >> bit & 1 for model in knowledge_base.models
+                ))
+
+    def test_probability(self):
+        a, b, c = Symbol("A"), Symbol("B"), Symbol("C")
+        self.assertEqual(probability(Or(a, b), a), 2 / 3)
+        self.assertEqual(probability(Or(a, b), Not(a)), 1 / 3)
+        self.assertEqual(probability(a, c), 1 / 2)
+        self.assertIsNone(probability(And(a, Not(a)), b))
+        self.assertEqual(marginals(puzzle.knowledge3)["B is a Knave"], 1.0)
+
+    def test_independent_components(self):
+        symbols = [Symbol(f"s{i}") for i in range(60)]
+        knowledge = And(*(Or(a, b) for a, b in zip(symbols[::2],
+                                                   symbols[1::2])))
+        total, trues = model_count(knowledge)
+        self.assertEqual(total, 3 ** 30)
+        self.assertEqual(trues["s0"], 2 * 3 ** 29)
+
+
+class TestSerialize(unittest.TestCase):
+
+    def test_parse_puzzles(self):
+        for knowledge in (puzzle.knowledge0, puzzle.knowledge1,
+                          puzzle.knowledge2, puzzle.knowledge3):
+            self.assertEqual(serialize.parse(knowledge.formula()), knowledge)
+
+    def test_parse_random_sentences(self):
+        rng = random.Random(10)
+        for _ in range(500):
+            sentence = random_sentence(rng, 4)
+            parsed = serialize.parse(sentence.formula())
+            self.assertEqual(parsed.formula(), sentence.formula())
+            self.assertTrue(truth_table_check(parsed, sentence))
+            self.assertTrue(truth_table_check(sentence, parsed))
+
+    def test_parse_precedence(self):
+        a, b, c = Symbol("A"), Symbol("B"), Symbol("C")
+        self.assertEqual(serialize.parse("A ∨ B ∧ ¬C"),
+                         Or(a, And(b, Not(c))))
+        self.assertIs(serialize.parse("A => B => C"),
+                      Implication(a, Implication(b, c)))
+        self.assertIs(serialize.parse("A => B <=> C"),
+                      Biconditional(Implication(a, b), c))
+        self.assertIs(serialize.parse("A is a Knight"),
+                      Symbol("A is a Knight"))
+
+    def test_parse_errors(self):
+        for text in ("A ∧", "(A", "A )", "∧ B", "A => => B", "¬"):
+            with self.assertRaises(ValueError):
+                serialize.parse(text)
+
+    def test_empty_conjunctions_and_disjunctions(self):
+        a = Symbol("A")
+        for sentence in (And(), Or(), And(And(), a), Or(a, Or())):
+            with self.assertRaises(ValueError):
+                serialize.parse(sentence.formula())
+            loaded = serialize.loads(serialize.dumps([sentence]))[0]
+            self.assertEqual(loaded, sentence)
+
+    def test_round_trip_shares_subsentences(self):
+        a, b = Symbol("A"), Symbol("B")
+        shared = And(a, Not(b))
+        sentences = [Or(shared, Implication(shared, b)), shared, a]
+        data = serialize.dumps(sentences)
+        loaded = serialize.loads(data)
+        self.assertEqual(loaded, sentences)
+        self.assertIs(loaded[2], a)
+
+        # Conjunctions are not interned, but one shared in the file is
+        # one shared object after loading
+        self.assertIsNot(loaded[1], shared)
+        self.assertIs(loaded[0].disjuncts[0], loaded[1])
+        self.assertIs(loaded[0].disjuncts[1].antecedent, loaded[1])
+
+        # Each distinct node is stored once: A, B, ¬B, the And, the
+        # Implication and the Or
+        self.assertEqual(serialize.HEADER.unpack_from(data)[2], 6)
+
+    def test_round_trip_deep_sentence(self):
+        sentence = Symbol("A")
+        for _ in range(5000):
+            sentence = Not(sentence)
+        self.assertIs(serialize.loads(serialize.dumps([sentence]))[0],
+                      sentence)
+
+    def test_dump_and_load(self):
+        sentences = [puzzle.knowledge3, Symbol("Ä")]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "knowledge.bin")
+            serialize.dump(sentences, path)
+            self.assertEqual(serialize.load(path), sentences)
+        with self.assertRaises(ValueError):
+            serialize.loads(b"\0" * serialize.HEADER.size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 import itertools
 import random
+from collections import deque
 
 
 class Minesweeper():
@@ -162,26 +163,67 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Sentences about the game known to be true, keyed by their
+        # cells so that a sentence is never stored twice
+        self.knowledge = {}
+
+        # Keys of the sentences that mention each cell
+        self.sentences_with = {}
+
+        # Keys of sentences added or changed since they were last used
+        # for inference
+        self.pending = deque()
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base and queues it for
+        inference, unless it is empty or already known.
+        """
+        key = frozenset(sentence.cells)
+        if not key or key in self.knowledge:
+            return
+        self.knowledge[key] = sentence
+        for cell in key:
+            self.sentences_with.setdefault(cell, set()).add(key)
+        self.pending.append(key)
+
+    def remove_sentence(self, key):
+        """
+        Removes the sentence about the cells in `key` from the knowledge
+        base and returns it.
+        """
+        for cell in key:
+            keys = self.sentences_with[cell]
+            keys.discard(key)
+            if not keys:
+                del self.sentences_with[cell]
+        return self.knowledge.pop(key)
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
+        if cell in self.mines:
+            return
         self.mines.add(cell)
-        for sentence in self.knowledge:
+        for key in list(self.sentences_with.get(cell, ())):
+            sentence = self.remove_sentence(key)
             sentence.mark_mine(cell)
+            self.add_sentence(sentence)
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
+        if cell in self.safes:
+            return
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        for key in list(self.sentences_with.get(cell, ())):
+            sentence = self.remove_sentence(key)
             sentence.mark_safe(cell)
+            self.add_sentence(sentence)
 
     # method to find all surrounding cells that are valid moves
     def get_neighbors(self, cell, count):
@@ -209,6 +251,47 @@ class MinesweeperAI():
 
         return neighbors_list, count
 
+    def infer(self):
+        """
+        Draws conclusions from the queued sentences until none are
+        left. A sentence that determines its cells marks them, which
+        queues the sentences it changes; otherwise it is compared with
+        the sentences it shares cells with, and whenever one's cells
+        contain the other's the difference becomes a new sentence.
+        """
+        while self.pending:
+            key = self.pending.popleft()
+
+            # Skip sentences changed or removed since they were queued
+            sentence = self.knowledge.get(key)
+            if sentence is None:
+                continue
+
+            if sentence.known_mines():
+                for cell in key:
+                    self.mark_mine(cell)
+                continue
+            if sentence.known_safes():
+                for cell in key:
+                    self.mark_safe(cell)
+                continue
+
+            # Only sentences sharing a cell can be subsets or supersets
+            related = set()
+            for cell in key:
+                related |= self.sentences_with[cell]
+            related.discard(key)
+            for other in related:
+                count = self.knowledge[other].count
+                if other < key:
+                    self.add_sentence(
+                        Sentence(key - other, sentence.count - count)
+                    )
+                elif key < other:
+                    self.add_sentence(
+                        Sentence(other - key, count - sentence.count)
+                    )
+
     def add_knowledge(self, cell, count):
         """
         Called when the Minesweeper board tells us, for a given
@@ -235,25 +318,11 @@ class MinesweeperAI():
         # step 3
         # add the surrounding cells with mine count
         neighbors, count = self.get_neighbors(cell, count)
-        knowledge = Sentence(neighbors, count)
-        self.knowledge.append(knowledge)
+        self.add_sentence(Sentence(neighbors, count))
 
-        # step 4
-        # Find all mines for all sentences
-        for sentence in self.knowledge:
-            if sentence.known_mines():
-                for mine in sentence.known_mines():
-                    self.mines.add(mine)
-                    for s in self.knowledge:
-                        s.mark_mine(mine)
-
-        # step 5
-            # Remove all safe cells if the count is greater than 0
-            if sentence.known_safes():
-                for safe in sentence.known_safes():
-                    for s in self.knowledge:
-                        if s.count > 0 and safe in s.cells:
-                            s.mark_safe(safe)
+        # steps 4 and 5
+        # propagate from the sentences the move added or changed
+        self.infer()
 
     def make_safe_move(self):
         """
@@ -264,25 +333,11 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-
-        # search through sentences until a safe move is found
-        for sentence in self.knowledge.copy():
-            if sentence.known_safes() is None:
-                continue
-
-            # remove empty sentences
-            if len(sentence.cells) == 0:
-                self.knowledge.remove(sentence)
-                continue
-
-            # if safemoves return one
-            if sentence.known_safes() is not None:
-                cell = sentence.cells.pop()
-                return cell
+        for cell in self.safes - self.moves_made:
+            return cell
 
         # return none if no safe moves known
-        else:
-            return None
+        return None
 
     def make_random_move(self):
         """
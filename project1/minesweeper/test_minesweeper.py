@@ -0,0 +1,140 @@
+import importlib.util
+import os
+import random
+import unittest
+
+try:
+    import pygame
+except ImportError:
+    pygame = None
+
+from minesweeper import Minesweeper, MinesweeperAI, Sentence
+from worker import AIWorker
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_runner():
+    """
+    Imports runner.py under a dummy video driver, so no window opens;
+    its fonts and images are found relative to this directory.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    spec = importlib.util.spec_from_file_location(
+        "minesweeper_runner", os.path.join(DIRECTORY, "runner.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    cwd = os.getcwd()
+    os.chdir(DIRECTORY)
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+    return module
+
+
+@unittest.skipIf(pygame is None, "pygame is not installed")
+class TestRunner(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.runner = load_runner()
+        cls.addClassCleanup(pygame.quit)
+
+    def setUp(self):
+        self.worker = AIWorker()
+        self.addCleanup(self.worker.shutdown)
+
+    def frames(self, flags):
+        """Draws frames like the game loop until the AI move arrives."""
+        for _ in range(500):
+            move, flags = self.runner.step_ai(self.worker, flags)
+            if not self.worker.thinking():
+                return move, flags
+            self.runner.screen.fill(self.runner.BLACK)
+            pygame.display.flip()
+            self.runner.clock.tick(self.runner.FPS)
+        self.fail("AI never moved")
+
+    def test_knowledge_is_added_before_the_move(self):
+        ai = MinesweeperAI(height=3, width=3)
+        self.worker.run(ai.add_knowledge, (0, 0), 0)
+        self.worker.think(self.runner.ai_move, ai)
+        move, flags = self.frames(set())
+        self.assertIn(move, {(0, 1), (1, 0), (1, 1)})
+        self.assertEqual(flags, set())
+
+    def test_known_mines_are_flagged_when_out_of_moves(self):
+        ai = MinesweeperAI(height=1, width=2)
+        self.worker.run(ai.add_knowledge, (0, 0), 1)
+        self.worker.think(self.runner.ai_move, ai)
+        move, flags = self.frames(set())
+        self.assertIsNone(move)
+        self.assertEqual(flags, {(0, 1)})
+
+    def test_no_move_while_idle(self):
+        flags = {(0, 0)}
+        self.assertEqual(self.runner.step_ai(self.worker, flags),
+                         (None, flags))
+
+
+class TestMinesweeperAI(unittest.TestCase):
+
+    def test_subset_inference(self):
+        # A 1-1-2-1-1 top row: {(1, 0), (1, 1), (1, 2)} holds one mine
+        # like its subset {(1, 0), (1, 1)}, so (1, 2) is safe, which
+        # leaves both cells beside it as the 2's mines
+        ai = MinesweeperAI(height=2, width=5)
+        for cell, count in zip(((0, 0), (0, 1), (0, 2), (0, 3), (0, 4)),
+                               (1, 1, 2, 1, 1)):
+            ai.add_knowledge(cell, count)
+        self.assertEqual(ai.mines, {(1, 1), (1, 3)})
+        self.assertEqual(ai.safes - ai.moves_made, {(1, 0), (1, 2), (1, 4)})
+
+    def test_sentences_are_not_duplicated(self):
+        ai = MinesweeperAI(height=3, width=3)
+        ai.add_sentence(Sentence({(0, 0), (0, 1)}, 1))
+        ai.add_sentence(Sentence({(0, 1), (0, 0)}, 1))
+        self.assertEqual(list(ai.knowledge.values()),
+                         [Sentence({(0, 0), (0, 1)}, 1)])
+        self.assertEqual(ai.sentences_with[(0, 0)],
+                         {frozenset({(0, 0), (0, 1)})})
+
+    def test_resolved_sentences_are_removed(self):
+        ai = MinesweeperAI(height=3, width=3)
+        ai.add_knowledge((0, 0), 1)
+        ai.mark_mine((1, 1))
+        ai.infer()
+        self.assertEqual(ai.knowledge, {})
+        self.assertEqual(ai.sentences_with, {})
+        self.assertEqual(ai.safes, {(0, 0), (0, 1), (1, 0)})
+
+    def test_safe_moves_are_new(self):
+        ai = MinesweeperAI(height=1, width=3)
+        ai.add_knowledge((0, 0), 0)
+        self.assertEqual(ai.make_safe_move(), (0, 1))
+        ai.add_knowledge((0, 1), 1)
+        self.assertIsNone(ai.make_safe_move())
+        self.assertEqual(ai.mines, {(0, 2)})
+
+    def test_expert_board_conclusions_are_sound(self):
+        random.seed(0)
+        game = Minesweeper(height=16, width=30, mines=99)
+        ai = MinesweeperAI(height=16, width=30)
+        cells = [(i, j) for i in range(16) for j in range(30)
+                 if not game.is_mine((i, j))]
+
+        # Reveal every safe cell, guessing among them when stuck
+        while len(ai.moves_made) < len(cells):
+            move = ai.make_safe_move()
+            if move is None:
+                move = random.choice([cell for cell in cells
+                                      if cell not in ai.moves_made])
+            ai.add_knowledge(move, game.nearby_mines(move))
+            self.assertLessEqual(ai.mines, game.mines)
+            self.assertFalse(ai.safes & game.mines)
+        self.assertEqual(ai.knowledge, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
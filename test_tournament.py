@@ -0,0 +1,43 @@
+import unittest
+
+import tournament
+
+
+class TestTournament(unittest.TestCase):
+
+    def test_minimax_never_loses(self):
+        report = tournament.tournament("tictactoe", 20, opponent="random")
+        self.assertEqual(report["counts"]["loss"], 0)
+        self.assertEqual(sum(report["counts"].values()), 20)
+        self.assertGreater(report["moves"], 0)
+        self.assertLessEqual(report["latency_ms"]["p50"],
+                             report["latency_ms"]["p99"])
+
+    def test_self_play_is_a_draw(self):
+        report = tournament.tournament("tictactoe", 4, opponent="self")
+        self.assertEqual(report["rates"]["draw"], 1.0)
+
+    def test_games_are_repeatable(self):
+        first = tournament.tournament("minesweeper", 10, seed=3)
+        second = tournament.tournament("minesweeper", 10, workers=2, seed=3)
+        self.assertEqual(first["counts"], second["counts"])
+        self.assertEqual(first["moves"], second["moves"])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(tournament.percentile(values, 0.5), 50)
+        self.assertEqual(tournament.percentile(values, 0.99), 99)
+        self.assertEqual(tournament.percentile([7], 0.9), 7)
+        self.assertIsNone(tournament.percentile([], 0.5))
+
+    def test_regressions(self):
+        baseline = {"rates": {"win": 0.9, "draw": 0.1, "loss": 0.0},
+                    "games_per_second": 100.0}
+        self.assertEqual(tournament.regressions(baseline, baseline), [])
+        worse = {"rates": {"win": 0.5, "draw": 0.1, "loss": 0.4},
+                 "games_per_second": 50.0}
+        self.assertEqual(len(tournament.regressions(worse, baseline)), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
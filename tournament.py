@@ -0,0 +1,262 @@
+"""
+Headless self-play harness for the game AIs
+
+Plays many games of tictactoe, minesweeper or nim across processes
+and reports throughput, per-move latency and win/draw/loss rates as
+JSON. With --baseline it compares against an earlier report and exits
+with status 1 if the AI got weaker or slower.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+for project in ("project0/tictactoe", "project1/minesweeper", "project4/nim"):
+    sys.path.insert(0, os.path.join(ROOT, project))
+
+OUTCOMES = ("win", "draw", "loss")
+
+# Trained NimAI shared with every worker process
+NIM_AI = None
+
+
+def initializer(nim_ai):
+    global NIM_AI
+    NIM_AI = nim_ai
+
+
+def timed(function, *args):
+    """Returns the result of calling `function` and the seconds it took."""
+    start = time.perf_counter()
+    value = function(*args)
+    return value, time.perf_counter() - start
+
+
+def play_tictactoe(opponent, ai_first):
+    """
+    Plays one game of minimax against `opponent` and returns the
+    outcome for the minimax player and the seconds each of its moves
+    took.
+    """
+    import tictactoe as ttt
+
+    board = ttt.initial_state()
+    ai_player = ttt.X if ai_first else ttt.O
+    latencies = []
+    while not ttt.terminal(board):
+        if ttt.player(board) == ai_player or opponent == "self":
+            action, elapsed = timed(ttt.minimax, board)
+            latencies.append(elapsed)
+        else:
+            action = random.choice(sorted(ttt.actions(board)))
+        board = ttt.result(board, action)
+
+    winner = ttt.winner(board)
+    if winner is None:
+        return "draw", latencies
+    return "win" if winner == ai_player else "loss", latencies
+
+
+def play_minesweeper(opponent, ai_first, height=8, width=8, mines=8):
+    """
+    Plays one game of minesweeper with MinesweeperAI. It wins by
+    revealing every safe cell and loses by revealing a mine; a game
+    it gives up on counts as a draw. `opponent` and `ai_first` are
+    unused since the game has one player.
+    """
+    from minesweeper import Minesweeper, MinesweeperAI
+
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width)
+    revealed = set()
+    latencies = []
+
+    # Every move reveals a cell, so this bounds a working AI
+    for _ in range(2 * height * width):
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+        if move is None:
+            latencies.append(time.perf_counter() - start)
+            break
+        if game.is_mine(move):
+            latencies.append(time.perf_counter() - start)
+            return "loss", latencies
+        revealed.add(move)
+        ai.add_knowledge(move, game.nearby_mines(move))
+        latencies.append(time.perf_counter() - start)
+        if len(revealed) == height * width - mines:
+            return "win", latencies
+    return "draw", latencies
+
+
+def play_nim(opponent, ai_first):
+    """
+    Plays one game of the trained NimAI against `opponent` and returns
+    the outcome for the AI and the seconds each of its moves took.
+    """
+    from nim import Nim
+
+    game = Nim()
+    ai_player = 0 if ai_first else 1
+    latencies = []
+    while game.winner is None:
+        if game.player == ai_player or opponent == "self":
+            action, elapsed = timed(NIM_AI.choose_action, game.piles, False)
+            latencies.append(elapsed)
+        else:
+            action = random.choice(sorted(Nim.available_actions(game.piles)))
+        game.move(action)
+    return "win" if game.winner == ai_player else "loss", latencies
+
+
+GAMES = {
+    "tictactoe": play_tictactoe,
+    "minesweeper": play_minesweeper,
+    "nim": play_nim,
+}
+
+
+def play(game, opponent, seed):
+    """
+    Plays game number `seed`, alternating which side the AI takes,
+    and returns its (outcome, latencies).
+    """
+    random.seed(seed)
+    return GAMES[game](opponent, seed % 2 == 0)
+
+
+def percentile(values, fraction):
+    """Returns the nearest-rank percentile of sorted `values`."""
+    if not values:
+        return None
+    rank = max(1, math.ceil(fraction * len(values)))
+    return values[rank - 1]
+
+
+def tournament(game, games, workers=1, opponent="random", seed=0,
+               nim_ai=None):
+    """
+    Plays `games` games on `workers` processes and returns a report
+    of throughput, move latency in milliseconds and outcome rates.
+    """
+    seeds = range(seed, seed + games)
+    start = time.perf_counter()
+    if workers <= 1:
+        initializer(nim_ai)
+        results = [play(game, opponent, s) for s in seeds]
+    else:
+        with ProcessPoolExecutor(workers, initializer=initializer,
+                                 initargs=(nim_ai,)) as pool:
+            chunksize = max(1, games // (4 * workers))
+            results = list(pool.map(play, [game] * games, [opponent] * games,
+                                    seeds, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    counts = {outcome: 0 for outcome in OUTCOMES}
+    latencies = []
+    for outcome, moves in results:
+        counts[outcome] += 1
+        latencies.extend(moves)
+    latencies = sorted(1000 * latency for latency in latencies)
+
+    return {
+        "game": game,
+        "opponent": opponent,
+        "games": games,
+        "workers": workers,
+        "seed": seed,
+        "seconds": elapsed,
+        "games_per_second": games / elapsed if elapsed else None,
+        "moves": len(latencies),
+        "latency_ms": {
+            "mean": sum(latencies) / len(latencies) if latencies else None,
+            "p50": percentile(latencies, 0.50),
+            "p90": percentile(latencies, 0.90),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else None,
+        },
+        "counts": counts,
+        "rates": {outcome: counts[outcome] / games for outcome in OUTCOMES},
+    }
+
+
+def regressions(report, baseline, tolerance=0.1):
+    """
+    Returns a list of ways `report` is worse than `baseline`: a win
+    rate or loss rate more than `tolerance` worse, or a throughput
+    more than `tolerance` as a fraction lower.
+    """
+    problems = []
+    if report["rates"]["win"] < baseline["rates"]["win"] - tolerance:
+        problems.append(f"win rate fell from {baseline['rates']['win']:.3f} "
+                        f"to {report['rates']['win']:.3f}")
+    if report["rates"]["loss"] > baseline["rates"]["loss"] + tolerance:
+        problems.append(f"loss rate rose from "
+                        f"{baseline['rates']['loss']:.3f} "
+                        f"to {report['rates']['loss']:.3f}")
+    if (report["games_per_second"] or 0) < \
+            (1 - tolerance) * (baseline["games_per_second"] or 0):
+        problems.append(f"games per second fell from "
+                        f"{baseline['games_per_second']:.1f} "
+                        f"to {report['games_per_second']:.1f}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play the game AIs headless and report how they do."
+    )
+    parser.add_argument("game", choices=sorted(GAMES))
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--opponent", choices=("random", "self"),
+                        default="random")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--train", type=int, default=10000,
+                        help="games of nim training before the tournament")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="earlier JSON report to compare "
+                        "against; exits with status 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    nim_ai = None
+    if args.game == "nim":
+        import nim
+        random.seed(args.seed)
+
+        # train() prints a line for every game
+        with contextlib.redirect_stdout(io.StringIO()):
+            nim_ai = nim.train(args.train)
+
+    report = tournament(args.game, args.games, args.workers, args.opponent,
+                        args.seed, nim_ai)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        problems = regressions(report, baseline, args.tolerance)
+        for problem in problems:
+            print(f"Regression: {problem}", file=sys.stderr)
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()